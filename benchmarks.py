@@ -0,0 +1,381 @@
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+
+from pdf_processor import PathologyReportExtractor
+
+SAMPLE_PDF = "AHM-209989_result_wlpd.pdf"
+SAMPLE_REPORT = "health_report_data.json"
+
+def _report(label, legacy_s, new_s, number):
+    print(f"{label}")
+    print(f"  legacy : {legacy_s / number * 1e6:9.1f} us/run")
+    print(f"  new    : {new_s / number * 1e6:9.1f} us/run")
+    print(f"  speedup: {legacy_s / new_s:9.2f}x")
+
+# ------------------ Test pattern scanner ------------------
+def bench_test_scanner(text, number=2000):
+    """Per-pattern re.search loop vs the single-pass TestPatternScanner"""
+    tables = [
+        (PathologyReportExtractor.HEMATOLOGY_PATTERNS, PathologyReportExtractor._hematology_scanner),
+        (PathologyReportExtractor.BIOCHEMISTRY_PATTERNS, PathologyReportExtractor._biochemistry_scanner),
+        (PathologyReportExtractor.URINE_PATTERNS, PathologyReportExtractor._urine_scanner),
+    ]
+
+    def legacy():
+        for patterns, _ in tables:
+            for pattern, _name in patterns:
+                re.search(pattern, text)
+
+    def scanner():
+        for _, scanner in tables:
+            scanner.scan(text)
+
+    for patterns, scanner_obj in tables:
+        expected = [(name, m.span()) for pattern, name in patterns for m in [re.search(pattern, text)] if m]
+        assert [(name, m.span()) for name, m in scanner_obj.scan(text)] == expected
+
+    # Best of several repeats: a single run of either loop is only ~0.2 ms and the ratio is noise-sensitive
+    _report("Test pattern scanner", min(timeit.repeat(legacy, number=number, repeat=5)),
+            min(timeit.repeat(scanner, number=number, repeat=5)), number)
+
+# ------------------ Status classification ------------------
+def bench_status_classifier(rows=200000, seed=0):
+    """Scalar determine_test_status loop vs the NumPy batch classifier on synthetic historical results"""
+    extractor = PathologyReportExtractor()
+    rng = random.Random(seed)
+    catalog = [(name, "", ref["ranges"]) for name, ref in extractor.test_reference_data.items()] + [
+        ("M.C.H.", "27 - 32", {"normal_min": 27, "normal_max": 32}),
+        ("M.C.H.C.", "32 - 36", {"normal_min": 32, "normal_max": 36}),
+        ("R.D.W", "11.5 - 14.5", {"normal_min": 11.5, "normal_max": 14.5}),
+        ("Polymorphs", "40 - 75", {"normal_min": 40, "normal_max": 75}),
+    ]
+    names, values, ranges = [], [], []
+    for _ in range(rows):
+        name, reference, bounds = rng.choice(catalog)
+        # Lab-precision values spread around the normal range, with occasional non-numeric entries
+        value = rng.uniform(bounds["normal_min"] * 0.7, bounds["normal_max"] * 1.3)
+        names.append(name)
+        values.append(rng.choice([f"{value:.1f}", f"{value:.1f}", f"{value:.0f}", "Nil"]))
+        ranges.append(reference)
+
+    start = time.perf_counter()
+    scalar = [extractor.determine_test_status(n, v, "", r) for n, v, r in zip(names, values, ranges)]
+    scalar_s = time.perf_counter() - start
+
+    # Keep the one-off NumPy import out of the timing
+    extractor.determine_test_statuses(names[:10], values[:10], ranges[:10])
+    start = time.perf_counter()
+    batch = extractor.determine_test_statuses(names, values, ranges)
+    batch_s = time.perf_counter() - start
+
+    assert batch == scalar
+    _report(f"Status classification ({rows} results)", scalar_s, batch_s, 1)
+
+# ------------------ Render context ------------------
+def bench_render_context(report_path=SAMPLE_REPORT, lang_codes=("en", "hi", "ur"), number=5):
+    """Fresh FontConfiguration + CSS parse per PDF vs the cached per-language RenderContext"""
+    import pdf_generator as gen
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
+
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report_data = json.load(f)
+    labels = {label: label for label in gen.COMMON_LABELS}
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for lang_code in lang_codes:
+            font_family = gen.register_font_for_lang(lang_code)
+            output_pdf = os.path.join(out_dir, f"{lang_code}.pdf")
+            html_content = gen.generate_report_html(report_data, lang_code, lang_code, labels, font_family)
+
+            def legacy():
+                font_config = FontConfiguration()
+                css = CSS(string=gen.get_css(lang_code, font_family, "logo_img.png"), font_config=font_config)
+                HTML(string=html_content, base_url=os.getcwd()).write_pdf(output_pdf, stylesheets=[css], font_config=font_config)
+
+            def cached():
+                context = gen.get_render_context(lang_code, font_family)
+                HTML(string=html_content, base_url=context.base_url).write_pdf(
+                    output_pdf, stylesheets=context.stylesheets, font_config=context.font_config)
+
+            gen.clear_render_contexts()
+            start = time.perf_counter()
+            cached()
+            first_s = time.perf_counter() - start
+            print(f"Render context setup [{lang_code}]: "
+                  f"{gen.get_render_context(lang_code, font_family).setup_seconds * 1e3:.1f} ms, first render {first_s * 1e3:.1f} ms")
+            legacy_s, cached_s = timeit.timeit(legacy, number=number), timeit.timeit(cached, number=number)
+            _report(f"PDF render [{lang_code}]", legacy_s, cached_s, number)
+            print(f"  saved  : {(legacy_s - cached_s) / number * 1e3:9.1f} ms/PDF")
+
+# ------------------ Report HTML ------------------
+def legacy_report_html(translated_data, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png"):
+    """generate_report_html as it was before the cached templates: one f-string per part, += per test"""
+    from pdf_generator import generate_bar_chart_html
+
+    now = datetime.now().strftime('%B %d, %Y')
+    
+    # --- Header (runs on every page) ---
+    header_html = f'''
+    <div id="page-header">
+        <img src="{letterhead_path}" class="letterhead" alt="letterhead">
+        <h1>{labels.get("Health Report Summary", "Health Report Summary")}</h1>
+    </div>
+    '''
+    
+    footer_html = f'''
+    <div id="page-footer">
+        <span class="date">{labels.get('Generated on','Generated on')}: {now}</span>
+        <span class="page-num">Page <span class="paged-counter"></span></span>
+    </div>
+    '''
+    
+    # --- Title Page ---
+    title_page_html = f'''
+    <div class="title-page">
+        <h1>{labels.get("Health Report Summary", "Health Report Summary")}</h1>
+        <h2>{labels.get("Confidential Medical Document", "Confidential Medical Document")}</h2>
+
+        <div class="info-box">
+            <p><b>{labels.get('Language','Language')}:</b> {lang_name}</p>
+            <p><b>{labels.get('Generated on','Generated on')}:</b> {now}</p>
+        </div>
+    </div>
+    '''
+
+    # --- Content ---
+    content_html = ""
+    for test in translated_data.get('tests', []):
+        status_class = f"status-{test.get('status','NA').title()}"
+        rows = [
+            (labels.get('Test','Test'), f"<b>{test['name']}</b>", False),
+            (labels.get('Result','Result'), f'<span class="{status_class}">{test["value"]} {test.get("unit","").strip()}</span>', False),
+            (labels.get('Status','Status'), f'<span class="{status_class}">{test.get("status","N/A")}</span>', False),
+            (labels.get('Reference','Reference'), test.get('reference_range','N/A'), False),
+            (labels.get('Chart','Chart'), generate_bar_chart_html(test, test['value'], lang_code), True)
+        ]
+        if 'meaning' in test and test['meaning']:
+            rows.append((labels.get('Meaning','Meaning'), test['meaning'], False))
+        if 'tips' in test and test['tips']:
+            rows.append((labels.get('Tips','Tips'), test['tips'], False))
+        
+        table_rows_html = "".join(
+            f'<tr><td class="test-key-col">{key}:</td><td>{value}</td></tr>' for key, value, _ in rows
+        )
+        
+        content_html += f'''
+        <table class="test-table">
+            <tbody>
+                {table_rows_html}
+            </tbody>
+        </table>
+        '''
+    
+    content_html += f'''
+    <p style="text-align: center; font-size: 8pt; color: #808080; margin-top: 20px;">
+        {labels.get("End of Report", "End of Report")}
+    </p>
+    '''
+
+    # --- Full HTML ---
+    html_doc = f'''
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">        
+        <title>{labels.get("Health Report Summary")}</title>
+        <style>
+            @page {{
+                size: A4;
+                margin: 120px 50px 60px 50px;
+                @top-center {{
+                    content: element(page-header);
+                }}
+                @bottom-center {{
+                    content: element(page-footer);
+                }}
+            }}
+
+            body {{
+                font-family: 'Arial', sans-serif;
+                font-size: 14px;
+                line-height: 1.6;
+                text-align: justify;
+            }}
+
+            /* --- Repeating Header --- */
+            #page-header {{
+                position: running(page-header);
+                height: 90px;
+                width: 100%;
+            }}
+            #page-header img.letterhead {{
+                position: absolute;
+                top: 10px;
+                right: -200px;
+                width: 200px;
+                height: auto;
+            }}
+            #page-header h1 {{
+                margin: 0;
+                padding: 0;
+                font-size: 14pt;
+                color: #191970;
+            }}
+
+            /* --- Repeating Footer --- */
+            #page-footer {{
+                position: running(page-footer);
+                font-size: 5pt;
+                color: #808080;
+                text-align: center;
+            }}
+
+            .test-table {{
+                width: 100%;
+                border-collapse: collapse;
+                margin-bottom: 15px;
+                border: 0.6px solid #808080;
+            }}
+            .test-table td {{
+                padding: 5px;
+                border: 0.25px solid #808080;
+                vertical-align: middle;
+            }}
+            .test-key-col {{
+                width: 80px;
+                font-weight: bold;
+                background-color: #f8f8f8;
+            }}
+        </style>
+    </head>
+    <body>
+
+        {header_html}
+        {footer_html}
+        {title_page_html}
+
+        <div id="content">
+            {content_html}
+        </div>
+
+    </body>
+    </html>
+    '''
+    return html_doc
+
+def bench_report_html(report_path=SAMPLE_REPORT, tests=50, number=200):
+    """HTML generation time and peak allocation for a report padded to `tests` tests"""
+    import pdf_generator as gen
+
+    with open(report_path, 'r', encoding='utf-8') as f:
+        sample = json.load(f)["tests"]
+    report_data = {"tests": [sample[i % len(sample)] for i in range(tests)]}
+    labels = {label: label for label in gen.COMMON_LABELS}
+
+    def legacy():
+        return legacy_report_html(report_data, "hi", "Hindi", labels, "Noto Sans Devanagari")
+
+    def build():
+        return gen.generate_report_html(report_data, "hi", "Hindi", labels, "Noto Sans Devanagari")
+
+    def stream():
+        for _ in gen.iter_report_html(report_data, "hi", "Hindi", labels, "Noto Sans Devanagari"):
+            pass
+
+    assert build() == legacy()
+    peaks = {}
+    for name, func in (("legacy", legacy), ("joined", build)):
+        tracemalloc.start()
+        func()
+        peaks[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    _report(f"Report HTML ({tests} tests)", timeit.timeit(legacy, number=number), timeit.timeit(build, number=number),
+            number)
+    print(f"  stream : {timeit.timeit(stream, number=number) / number * 1e6:9.1f} us/run")
+    print(f"  peak   : legacy {peaks['legacy'] / 1024:.0f} KiB, joined {peaks['joined'] / 1024:.0f} KiB")
+
+# ------------------ Import time ------------------
+# Cumulative `python -X importtime` budget per module (ms, best of a few runs). Heavy third-party
+# packages must stay out of module import entirely; they are loaded on first use.
+IMPORT_BUDGETS_MS = {
+    "pdf_processor": 150,
+    "pdf_generator": 150,
+    "translation": 100,
+    "fonts": 100,
+    "render_service": 250,
+    "openai_client": 100,
+}
+LAZY_DEPENDENCIES = ("weasyprint", "deep_translator", "requests", "PyPDF2", "pdfplumber", "openai", "numpy", "PIL")
+
+def measure_import(module, runs=3):
+    """(best cumulative import time in ms, top-level packages imported) for `import module` in a fresh interpreter"""
+    best, imported = None, set()
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+        cumulative = None
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative_us, name = line[len("import time:"):].split("|")
+            name = name.strip()
+            imported.add(name.split(".")[0])
+            if name == module:
+                cumulative = int(cumulative_us) / 1000
+        best = cumulative if best is None else min(best, cumulative)
+    return best, imported
+
+def check_import_budget(budgets=IMPORT_BUDGETS_MS, runs=3):
+    """Prints each module's import time against its budget; returns the number of violations."""
+    violations = 0
+    for module, budget_ms in budgets.items():
+        elapsed_ms, imported = measure_import(module, runs)
+        eager = sorted(dep for dep in LAZY_DEPENDENCIES if dep in imported)
+        ok = elapsed_ms <= budget_ms and not eager
+        violations += not ok
+        note = f"  eagerly imports {', '.join(eager)}" if eager else ""
+        print(f"{'✅' if ok else '❌'} {module:<16} {elapsed_ms:7.1f} ms (budget {budget_ms} ms){note}")
+    return violations
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the extraction and rendering hot paths.")
+    parser.add_argument("pdf", nargs="?", default=SAMPLE_PDF, help="Sample pathology PDF for the extraction benchmarks")
+    parser.add_argument("--render", action="store_true", help="Also benchmark PDF rendering (needs WeasyPrint)")
+    parser.add_argument("--import-budget", action="store_true",
+                        help="Only check module import times against IMPORT_BUDGETS_MS; exits non-zero on regression")
+    args = parser.parse_args(argv)
+
+    if args.import_budget:
+        return 1 if check_import_budget() else 0
+
+    text = PathologyReportExtractor().extract_text_from_pdf(args.pdf)
+    if not text:
+        print(f"❌ Could not extract text from {args.pdf}")
+        return 1
+
+    bench_test_scanner(text)
+    bench_status_classifier()
+    bench_report_html()
+    if args.render:
+        try:
+            bench_render_context()
+        except (ImportError, OSError) as e:
+            print(f"❌ Render benchmark needs WeasyPrint and its native libraries: {e}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
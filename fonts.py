@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import tempfile
+import functools
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# ------------------ Font Manifest ------------------
+# font_manifest.json lists the TTF used for every report language with its checksum.
+# Fonts are resolved to absolute paths once per process and are never downloaded while rendering;
+# run `python fonts.py --prefetch` to fetch missing ones ahead of time.
+FONT_MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "font_manifest.json")
+FONT_DIR = os.environ.get("REPORT_FONT_DIR", os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LANG = "en"
+
+class FontEntry:
+    def __init__(self, lang_code: str, file: str, family: str, path: str, url: str, sha256: str):
+        self.lang_code = lang_code
+        self.file = file
+        self.family = family
+        self.path = path
+        self.url = url
+        self.sha256 = sha256
+
+    @property
+    def available(self) -> bool:
+        return os.path.exists(self.path)
+
+    @property
+    def uri(self) -> str:
+        return Path(self.path).as_uri()
+
+    def checksum_ok(self) -> bool:
+        digest = hashlib.sha256()
+        with open(self.path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest() == self.sha256
+
+class FontRegistry:
+    """Per-language fonts from the manifest, with absolute paths under font_dir"""
+    def __init__(self, manifest: Dict, font_dir: str = FONT_DIR):
+        self.font_dir = os.path.abspath(font_dir)
+        base_url = manifest.get("base_url", "").rstrip("/")
+        self.fonts = {
+            lang_code: FontEntry(lang_code, entry["file"], entry["family"], os.path.join(self.font_dir, entry["file"]),
+                                 f"{base_url}/{entry['folder']}/{entry['file']}", entry["sha256"])
+            for lang_code, entry in manifest["fonts"].items()
+        }
+
+    def get(self, lang_code: str) -> FontEntry:
+        return self.fonts.get(lang_code, self.fonts[DEFAULT_LANG])
+
+    def missing(self) -> List[FontEntry]:
+        """Entries whose font file is absent, one per file"""
+        seen = {}
+        for entry in self.fonts.values():
+            if not entry.available:
+                seen.setdefault(entry.path, entry)
+        return list(seen.values())
+
+    def verify(self) -> List[str]:
+        """Problems with the installed fonts (missing files or checksum mismatches)"""
+        problems = []
+        for path, entry in {entry.path: entry for entry in self.fonts.values()}.items():
+            if not entry.available:
+                problems.append(f"missing: {path}")
+            elif not entry.checksum_ok():
+                problems.append(f"checksum mismatch: {path}")
+        return problems
+
+@functools.lru_cache(maxsize=None)
+def load_font_registry(manifest_path: str = FONT_MANIFEST_PATH, font_dir: str = FONT_DIR) -> FontRegistry:
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return FontRegistry(json.load(f), font_dir)
+
+_reported_missing = set()
+
+def report_missing_fonts(registry: Optional[FontRegistry] = None) -> List[FontEntry]:
+    """Warn (once per file) about fonts that are not installed; returns the missing entries."""
+    registry = registry or load_font_registry()
+    missing = registry.missing()
+    new = [entry for entry in missing if entry.path not in _reported_missing]
+    if new:
+        print(f"⚠️ {len(new)} report font(s) missing; those languages fall back to {registry.get(DEFAULT_LANG).family}. "
+              f"Run 'python fonts.py --prefetch' to install them:", file=sys.stderr)
+        for entry in new:
+            print(f"  {entry.lang_code}: {entry.path}", file=sys.stderr)
+            _reported_missing.add(entry.path)
+    return missing
+
+# ------------------ Prefetch ------------------
+def prefetch_fonts(registry: Optional[FontRegistry] = None, force: bool = False, timeout: int = 30) -> int:
+    """Download missing (or, with force, all) fonts and check their checksums. Returns the number of failures."""
+    import requests
+
+    registry = registry or load_font_registry()
+    os.makedirs(registry.font_dir, exist_ok=True)
+    failures = 0
+    for path, entry in {entry.path: entry for entry in registry.fonts.values()}.items():
+        if entry.available and not force:
+            continue
+        print(f"⬇️ Downloading font for {entry.lang_code}: {entry.file}")
+        try:
+            r = requests.get(entry.url, timeout=timeout)
+            r.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Failed to download font {entry.file}: {e}")
+            failures += 1
+            continue
+        if hashlib.sha256(r.content).hexdigest() != entry.sha256:
+            print(f"❌ Checksum mismatch for {entry.file}; not installed")
+            failures += 1
+            continue
+        fd, tmp_path = tempfile.mkstemp(dir=registry.font_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(r.content)
+        os.replace(tmp_path, path)
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check or install the report fonts listed in font_manifest.json.")
+    parser.add_argument("--prefetch", action="store_true", help="Download missing fonts")
+    parser.add_argument("--force", action="store_true", help="With --prefetch, re-download every font")
+    parser.add_argument("--verify", action="store_true", help="Check that every font is present with the expected checksum")
+    args = parser.parse_args(argv)
+
+    registry = load_font_registry()
+    if args.prefetch:
+        failures = prefetch_fonts(registry, force=args.force)
+        if failures:
+            return 1
+    if args.verify or args.prefetch:
+        problems = registry.verify()
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            return 1
+        print(f"✅ {len(registry.fonts)} language fonts verified in {registry.font_dir}")
+        return 0
+
+    for lang_code, entry in registry.fonts.items():
+        print(f"{lang_code}: {entry.family:<22} {'ok' if entry.available else 'MISSING':<8} {entry.path}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,5 +1,9 @@
 from PIL import Image, ImageDraw, ImageFont
-import textwrap
+import os
+import re
+import json
+import functools
+from io import BytesIO
 
 # ------------ Input Data ------------
 health_data = {
@@ -19,95 +23,126 @@ health_data = {
     ]
 }
 
+# ------------ Process-level Asset Cache ------------
+# Fonts and resized silhouettes are loaded once per process and shared by every render_infographic call.
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "NotoSans-Regular.ttf")
+SILHOUETTE_SIZE = (300, 400)
+FONT_SIZES = {"title": 40, "subtitle": 28, "normal": 24, "small": 20}
+
+@functools.lru_cache(maxsize=None)
+def get_font(size, path=FONT_PATH):
+    return ImageFont.truetype(path, size)
+
+@functools.lru_cache(maxsize=None)
+def get_silhouette(filename, size=SILHOUETTE_SIZE):
+    """Silhouette from assets/ converted to RGBA and resized, or None if it cannot be loaded."""
+    try:
+        return Image.open(os.path.join(ASSETS_DIR, filename)).convert("RGBA").resize(size)
+    except OSError:
+        return None
+
 # ------------ Select silhouette based on sex/age ------------
-sex = health_data["patient_info"]["sex"].lower()
-age = health_data["patient_info"]["age"]
-
-if sex.startswith("m"):
-    if age <= 3:
-        silhouette = "assets/baby neutral.png"
-    elif age <= 12:
-        silhouette = "assets/baby boy.png"
-    elif age <= 20:
-        silhouette = "assets/adult boy.png"
-    elif age <= 59:
-        silhouette = "assets/adult man.png"
+def select_silhouette(sex, age):
+    """Asset file name for the patient's sex and age in years."""
+    if str(sex).lower().startswith("m"):
+        if age <= 3:
+            return "baby neutral.png"
+        elif age <= 12:
+            return "baby boy.png"
+        elif age <= 20:
+            return "adult boy.png"
+        elif age <= 59:
+            return "adult man.png"
+        else:
+            return "old man.png"
     else:
-        silhouette = "assets/old man.png"
-else:
-    if age <= 3:
-        silhouette = "assets/baby neutral.png"
-    elif age <= 12:
-        silhouette = "assets/baby girl.png"
-    elif age <= 20:
-        silhouette = "assets/adult girl.png"
-    elif age <= 59:
-        silhouette = "assets/adult woman.png"
-    else:
-        silhouette = "assets/old woman.png"
+        if age <= 3:
+            return "baby neutral.png"
+        elif age <= 12:
+            return "baby girl.png"
+        elif age <= 20:
+            return "adult girl.png"
+        elif age <= 59:
+            return "adult woman.png"
+        else:
+            return "old woman.png"
+
+def _age_years(age):
+    """Age as an int from 10 or the extractor's '38 Y'; 0 if missing."""
+    match = re.search(r'\d+', str(age or ""))
+    return int(match.group()) if match else 0
 
-# ------------ Setup Canvas ------------
+# ------------ Canvas ------------
 W, H = 1000, 1400
 bg_color = (244, 247, 249)  # light background
-img = Image.new("RGB", (W, H), bg_color)
-draw = ImageDraw.Draw(img)
-
-# Fonts (adjust path to system fonts)
-title_font = ImageFont.truetype("NotoSans-Regular.ttf", 40)
-subtitle_font = ImageFont.truetype("NotoSans-Regular.ttf", 28)
-normal_font = ImageFont.truetype("NotoSans-Regular.ttf", 24)
-small_font = ImageFont.truetype("NotoSans-Regular.ttf", 20)
-
-# ------------ Header ------------
-draw.text((50, 40), "Personalized Summary & Vital Parameters", font=title_font, fill=(44, 62, 80))
-draw.rectangle([50, 90, 950, 90], fill=(224, 247, 250))
-draw.text((50, 90), "Your Health", font=subtitle_font, fill=(0, 121, 107))
-
-# ------------ Patient Info ------------
-draw.text((W//2 - 50, 120), f"{health_data['patient_info']['name']}", font=title_font, fill=(52, 73, 94))
-draw.text((W//2 - 60, 170), f"Age: {age}", font=subtitle_font, fill=(127, 140, 141))
-
-# ------------ Load Silhouette ------------
-try:
-    sil_img = Image.open(silhouette).convert("RGBA")
-    sil_img = sil_img.resize((300, 400))
-    img.paste(sil_img, (W//2 - 150, 250), sil_img)
-except:
-    draw.rectangle([W//2 - 150, 250, W//2 + 150, 650], outline="black", width=2)
-    draw.text((W//2 - 50, 420), "No Img", font=small_font, fill=(0, 0, 0))
-
-# ------------ Tests (split left/right) ------------
-cards = health_data["tests"]
-left_cards = cards[::2]
-right_cards = cards[1::2]
-
-def draw_card(x, y, test):
+
+def draw_card(draw, x, y, test, fonts):
     # Card background
     draw.rounded_rectangle([x, y, x+350, y+100], radius=15, fill=(248, 249, 250), outline=(200, 200, 200))
-    
+
     # Status color
-    status_color = (40,167,69) if test["status"]=="NORMAL" else (220,53,69) if test["status"]=="HIGH" else (255,193,7)
-    
+    status = str(test.get("status", "")).upper()
+    status_color = (40,167,69) if status=="NORMAL" else (220,53,69) if status=="HIGH" else (255,193,7)
+
     # Icon placeholder
     draw.ellipse([x+15, y+30, x+55, y+70], fill=(180,180,180))
-    
-    # Text
-    draw.text((x+70, y+20), test["name"], font=small_font, fill=(85,85,85))
-    draw.text((x+70, y+45), test["value"], font=normal_font, fill=(34,34,34))
-    draw.text((x+70, y+70), test["status"], font=small_font, fill=status_color)
-
-y_start = 700
-gap = 120
-for i, t in enumerate(left_cards):
-    draw_card(50, y_start + i*gap, t)
-
-for i, t in enumerate(right_cards):
-    draw_card(W-400, y_start + i*gap, t)
-
-# ------------ Footer ------------
-draw.text((W//2 - 220, H-80), "All lab results are subject to clinical interpretation.", font=small_font, fill=(150,150,150))
-draw.text((W//2 - 100, H-50), "Consult a physician.", font=small_font, fill=(150,150,150))
-
-# ------------ Save Output ------------
-img.save("health_report.png")
-print("✅ Saved as health_report.png")
+
+    # Text (extractor output keeps the unit separately)
+    value = " ".join(str(part) for part in (test.get("value"), test.get("unit")) if part not in (None, ""))
+    draw.text((x+70, y+20), str(test.get("name", "")), font=fonts["small"], fill=(85,85,85))
+    draw.text((x+70, y+45), value, font=fonts["normal"], fill=(34,34,34))
+    draw.text((x+70, y+70), status, font=fonts["small"], fill=status_color)
+
+def draw_infographic(report_data):
+    """Draws the summary infographic for one report and returns the PIL image."""
+    fonts = {name: get_font(size) for name, size in FONT_SIZES.items()}
+    patient_info = report_data.get("patient_info") or {}
+    age = _age_years(patient_info.get("age"))
+
+    img = Image.new("RGB", (W, H), bg_color)
+    draw = ImageDraw.Draw(img)
+
+    # ------------ Header ------------
+    draw.text((50, 40), "Personalized Summary & Vital Parameters", font=fonts["title"], fill=(44, 62, 80))
+    draw.rectangle([50, 90, 950, 90], fill=(224, 247, 250))
+    draw.text((50, 90), "Your Health", font=fonts["subtitle"], fill=(0, 121, 107))
+
+    # ------------ Patient Info ------------
+    draw.text((W//2 - 50, 120), f"{patient_info.get('name', '')}", font=fonts["title"], fill=(52, 73, 94))
+    draw.text((W//2 - 60, 170), f"Age: {age}", font=fonts["subtitle"], fill=(127, 140, 141))
+
+    # ------------ Silhouette ------------
+    sil_img = get_silhouette(select_silhouette(patient_info.get("sex", ""), age))
+    if sil_img is not None:
+        img.paste(sil_img, (W//2 - 150, 250), sil_img)
+    else:
+        draw.rectangle([W//2 - 150, 250, W//2 + 150, 650], outline="black", width=2)
+        draw.text((W//2 - 50, 420), "No Img", font=fonts["small"], fill=(0, 0, 0))
+
+    # ------------ Tests (split left/right) ------------
+    cards = report_data.get("tests", [])
+    y_start = 700
+    gap = 120
+    for i, t in enumerate(cards[::2]):
+        draw_card(draw, 50, y_start + i*gap, t, fonts)
+    for i, t in enumerate(cards[1::2]):
+        draw_card(draw, W-400, y_start + i*gap, t, fonts)
+
+    # ------------ Footer ------------
+    draw.text((W//2 - 220, H-80), "All lab results are subject to clinical interpretation.", font=fonts["small"], fill=(150,150,150))
+    draw.text((W//2 - 100, H-50), "Consult a physician.", font=fonts["small"], fill=(150,150,150))
+    return img
+
+def render_infographic(report_json, image_format="PNG"):
+    """Renders the infographic for a report (dict or JSON string) and returns the encoded image bytes."""
+    report_data = json.loads(report_json) if isinstance(report_json, (str, bytes)) else report_json
+    buffer = BytesIO()
+    draw_infographic(report_data).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+if __name__ == "__main__":
+    # ------------ Save Output ------------
+    with open("health_report.png", "wb") as f:
+        f.write(render_infographic(health_data))
+    print("✅ Saved as health_report.png")
@@ -1,7 +1,4 @@
 import os
-import openai
-from openai import OpenAI
-import requests
 from typing import Optional
 import json
 from datetime import datetime
@@ -13,6 +10,8 @@ class OpenAIClient:
         self.client = None
         if self.api_key:
             try:
+                # The openai SDK is slow to import; only load it when a key is configured
+                from openai import OpenAI
                 self.client = OpenAI(api_key=self.api_key)
                 print("OpenAI client initialized successfully")
             except Exception as e:
@@ -45,6 +44,7 @@ class OpenAIClient:
             image_url = response.data[0].url
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             image_path = f"temp/medical_infographic_{timestamp}.png"
+            import requests
             img_response = requests.get(image_url)
             with open(image_path, 'wb') as f:
                 f.write(img_response.content)
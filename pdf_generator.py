@@ -1,15 +1,25 @@
 import os
+import sys
 import json
-import requests
+import hashlib
+import argparse
+import time
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from concurrent.futures import BrokenExecutor, ThreadPoolExecutor, as_completed
 import re
 import unicodedata
+import functools
 from datetime import datetime
 from math import pi
 from io import BytesIO
-from weasyprint import HTML, CSS
-from weasyprint.text.fonts import FontConfiguration
 
-from deep_translator import GoogleTranslator
+from translation import get_default_translator, TranslationPlan
+from fonts import load_font_registry, report_missing_fonts
+
+# WeasyPrint (and the Pango/cairo stack behind it) is imported on first render, see load_weasyprint()
+HTML = CSS = FontConfiguration = None
 
 # A4 dimensions in pixels/points (WeasyPrint uses CSS for layout)
 A4_WIDTH = 595
@@ -19,103 +29,67 @@ LINE_HEIGHT = 12
 
 # ------------------ Font Handling ------------------
 # WeasyPrint requires the fonts to be accessible via CSS @font-face rules.
-# We'll use the same download logic and provide the path in CSS.
-FONT_MAP = {
-    "hi": ("NotoSansDevanagari-Regular.ttf", "Noto Sans Devanagari"),
-    "bn": ("NotoSansBengali-Regular.ttf", "Noto Sans Bengali"),
-    "ta": ("NotoSansTamil-Regular.ttf", "Noto Sans Tamil"),
-    "te": ("NotoSansTelugu-Regular.ttf", "Noto Sans Telugu"),
-    "ml": ("NotoSansMalayalam-Regular.ttf", "Noto Sans Malayalam"),
-    "gu": ("NotoSansGujarati-Regular.ttf", "Noto Sans Gujarati"),
-    "kn": ("NotoSansKannada-Regular.ttf", "Noto Sans Kannada"),
-    "pa": ("NotoSansGurmukhi-Regular.ttf", "Noto Sans Gurmukhi"),
-    "or": ("NotoSansOdia-Regular.ttf", "Noto Sans Odia"),
-    "as": ("NotoSansBengali-Regular.ttf", "Noto Sans Bengali"),
-    "en": ("NotoSans-Regular.ttf", "Noto Sans"),
-    # For Urdu, WeasyPrint/Pango handles the complex shaping (Nastaliq) well
-    "ur": ("NotoNastaliqUrdu-Regular.ttf", "Noto Nastaliq Urdu")
-}
+# Fonts come from font_manifest.json (see fonts.py), resolved to absolute paths once at startup.
+# For Urdu, WeasyPrint/Pango handles the complex shaping (Nastaliq) well
+FONT_REGISTRY = load_font_registry()
+FONT_MAP = {lang_code: (entry.file, entry.family) for lang_code, entry in FONT_REGISTRY.fonts.items()}
 
-def register_font_for_lang(lang_code="en"):
+def resolve_font(lang_code="en"):
     """
-    Downloads the font if missing. Returns the CSS font-family name.
-    (WeasyPrint will find the TTF file via CSS @font-face rules later).
+    The FontEntry a language renders with: its own font, or the English one if it is not installed.
+    Never downloads; missing fonts are reported once (install them with fonts.py --prefetch).
     """
-    ttf_file, font_family = FONT_MAP.get(lang_code, FONT_MAP["en"])
-    
-    if not os.path.exists(ttf_file):
-        folder_map = {
-            "hi": "NotoSansDevanagari", "bn": "NotoSansBengali", "ta": "NotoSansTamil", 
-            "te": "NotoSansTelugu", "ml": "NotoSansMalayalam", "gu": "NotoSansGujarati",
-            "kn": "NotoSansKannada", "pa": "NotoSansGurmukhi", "or": "NotoSansOdia",
-            "as": "NotoSansBengali", "en": "NotoSans", "ur" : "NotoNastaliqUrdu"
-        }
-        folder = folder_map.get(lang_code, "NotoSans")
-        url = f"https://github.com/googlefonts/noto-fonts/raw/main/hinted/ttf/{folder}/{ttf_file}"
-        print(f"⬇️ Downloading font for {lang_code}: {ttf_file}")
-        try:
-            r = requests.get(url, timeout=30)
-            r.raise_for_status()
-            with open(ttf_file, "wb") as f:
-                f.write(r.content)
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Failed to download font {ttf_file}. Proceeding with fallback: {e}")
-            return FONT_MAP["en"][1]
+    entry = FONT_REGISTRY.get(lang_code)
+    if not entry.available:
+        report_missing_fonts(FONT_REGISTRY)
+        return FONT_REGISTRY.get("en")
+    return entry
 
-    return font_family
+def register_font_for_lang(lang_code="en"):
+    """Returns the CSS font-family name for a language (see resolve_font for the fallback)."""
+    return resolve_font(lang_code).family
 
 # ------------------ Translation Helper (Same) ------------------
 def translate_text(text, target_lang):
-    if not text:
-        return ""
-    try:
-        # NOTE: Re-enabling translation
-        trans_text = GoogleTranslator(source="en", target=target_lang).translate(text)
-        return trans_text
-    except Exception:
-        return text
+    # Served from the persistent translation memory when possible (see translation.py)
+    return get_default_translator().translate(text, target_lang)
 
 # ------------------ Helpers for numeric normalization (Same) ------------------
+class _NumberCharTable(dict):
+    """
+    str.translate table for normalize_number_str: any Unicode digit -> ASCII digit, dashes -> '-',
+    '.'/'-' kept, everything else dropped. Filled lazily per code point, so it never scans all of Unicode.
+    """
+    def __missing__(self, codepoint):
+        ch = chr(codepoint)
+        try:
+            value = str(unicodedata.digit(ch))
+        except (TypeError, ValueError):
+            if ch in "−–—\u2012\u2013\u2014\u2212":
+                value = '-'
+            elif ch in ".-":
+                value = ch
+            else:
+                value = None
+        self[codepoint] = value
+        return value
+
+_NUMBER_CHAR_TABLE = _NumberCharTable()
+
 def normalize_number_str(s: str):
     """
     Convert Unicode digits (e.g. Devanagari, Bengali) to ASCII digits,
     remove common thousands separators, normalize dash/minus, and keep only digits, '.' and '-'.
     """
-    # ... (Logic is identical to previous version, kept for completeness) ...
     if s is None:
         return ""
-    s = str(s).strip()
-
-    normalized_chars = []
-    for ch in s:
-        try:
-            d = unicodedata.digit(ch)
-            normalized_chars.append(str(d))
-            continue
-        except (TypeError, ValueError):
-            pass
-
-        if ch in "−–—\u2012\u2013\u2014\u2212":
-            normalized_chars.append('-')
-            continue
-
-        if ch.isascii() and (ch.isdigit() or ch in ".-"):
-            normalized_chars.append(ch)
-            continue
-
-        if ch in [",", "\u2009", "\u202f"]:
-            continue
-        pass
-
-    cleaned = "".join(normalized_chars)
+    cleaned = str(s).strip().translate(_NUMBER_CHAR_TABLE)
 
     if cleaned.count('.') > 1:
-        parts = cleaned.split('.')
-        cleaned = parts[0] + '.' + ''.join(parts[1:])
+        head, _, tail = cleaned.partition('.')
+        cleaned = head + '.' + tail.replace('.', '')
 
-    if cleaned.count('-') > 1:
-        cleaned = cleaned.replace('-', '')
-    if '-' in cleaned and not cleaned.startswith('-'):
+    if '-' in cleaned and (not cleaned.startswith('-') or cleaned.count('-') > 1):
         cleaned = cleaned.replace('-', '')
 
     cleaned = cleaned.strip('.').strip()
@@ -131,10 +105,43 @@ COMMON_LABELS = [
 
 def get_translated_labels(lang_code):
     """Translates high-level report components."""
-    translated = {}
-    for label in COMMON_LABELS:
-        translated[label] = translate_text(label, lang_code)
-    return translated
+    plan = TranslationPlan()
+    slots = {label: plan.add(label) for label in COMMON_LABELS}
+    plan.run(get_default_translator(), lang_code)
+    return {label: plan.get(slot) for label, slot in slots.items()}
+
+def translate_report_data(report_data, lang_code, translator=None):
+    """
+    Translates the labels and every test's name/status/meaning/tips for one language in a
+    single deduplicated batch. Returns (labels, translated_data).
+    """
+    plan = TranslationPlan()
+    label_slots = {label: plan.add(label) for label in COMMON_LABELS}
+    test_slots = [
+        (test, plan.add(test["name"]), plan.add(test.get("status", "")),
+         plan.add(test.get("meaning", "")), plan.add(test.get("tips", "")))
+        for test in report_data.get("tests", [])
+    ]
+    plan.run(translator or get_default_translator(), lang_code)
+
+    labels = {label: plan.get(slot) for label, slot in label_slots.items()}
+    translated_data = {"tests": [
+        {
+            "name": plan.get(name),
+            "value": test["value"],
+            "unit": test.get("unit", ""),
+            "status": plan.get(status),
+            "reference_range": test.get("reference_range", ""),
+            "meaning": plan.get(meaning),
+            "tips": plan.get(tips)
+        }
+        for test, name, status, meaning, tips in test_slots
+    ]}
+    return labels, translated_data
+
+_RANGE_NUMBER_CHARS = r'[0-9\-\.,\u2009\u202f\u0966-\u096F\u09E6-\u09EF\u0BE6-\u0BEF\u0C66-\u0C6F\u0CE6-\u0CEF\u0AE6-\u0AEF\u0B66-\u0B6F\u0D66-\u0D6F\u0660-\u0669]+'
+_REFERENCE_RANGE_RE = re.compile(rf'({_RANGE_NUMBER_CHARS})\s*[-–—]\s*({_RANGE_NUMBER_CHARS})')
+_RANGE_DASH_TABLE = str.maketrans({'\u2013': '-', '\u2014': '-', '\u2212': '-', '\u2010': '-'})
 
 def parse_reference_range(reference_range):
     """
@@ -145,9 +152,8 @@ def parse_reference_range(reference_range):
     if not reference_range:
         return None
 
-    ref = str(reference_range).strip()
-    ref = ref.replace('\u2013', '-').replace('\u2014', '-').replace('\u2212', '-').replace('\u2010', '-')
-    match = re.search(r'([0-9\-\.,\u2009\u202f\u0966-\u096F\u09E6-\u09EF\u0BE6-\u0BEF\u0C66-\u0C6F\u0CE6-\u0CEF\u0AE6-\u0AEF\u0B66-\u0B6F\u0D66-\u0D6F\u0660-\u0669]+)\s*[-–—]\s*([0-9\-\.,\u2009\u202f\u0966-\u096F\u09E6-\u09EF\u0BE6-\u0BEF\u0C66-\u0C6F\u0CE6-\u0CEF\u0AE6-\u0AEF\u0B66-\u0B6F\u0D66-\u0D6F\u0660-\u0669]+)', ref)
+    ref = str(reference_range).strip().translate(_RANGE_DASH_TABLE)
+    match = _REFERENCE_RANGE_RE.search(ref)
     if match:
         a_raw, b_raw = match.group(1), match.group(2)
         a_norm = normalize_number_str(a_raw)
@@ -162,8 +168,25 @@ def parse_reference_range(reference_range):
             return None
     return None
 
+_CHART_STATUSES = ("high", "low", "normal")
+
 def generate_bar_chart_html(test_data, result_value, lang_code):
     """Generates a robust HTML bar chart with proper color coding and fallback handling."""
+    # Only high/low/normal change the chart, so a translated status shares the entry of any other
+    status = (test_data.get('status') or "").strip().lower()
+    status = status if status in _CHART_STATUSES else ""
+    try:
+        return _bar_chart_fragment(result_value, test_data.get('reference_range', ''), status)
+    except Exception as e:
+        print(f"⚠️ Chart generation error for test '{test_data.get('name', '')}': {e}")
+        return f'<div class="chart-container"><span style="color:#808080;">Chart N/A</span></div>'
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def _bar_chart_fragment(result_value, reference_range, status):
+    """
+    The chart HTML for (value, reference range, status), memoized: every language render of a
+    report, and every patient with the same result, reuses the fragment. Raises on bad input.
+    """
     BAR_WIDTH = 220
     BAR_HEIGHT = 12
 
@@ -171,32 +194,30 @@ def generate_bar_chart_html(test_data, result_value, lang_code):
     if not val_str:
         return f'<div class="chart-container"><div class="bar-na"></div><span class="label-na">N/A</span></div>'
 
-    try:
-        numeric_value = float(val_str)
-        ranges = parse_reference_range(test_data.get('reference_range', ''))
-        status = (test_data.get('status') or "").strip().lower()
-
-        # Default colors (fallback)
-        color_low = "#FF9999"     # light red/pink
-        color_normal = "#90EE90"  # light green
-        color_high = "#FFFF99"    # light yellow
-        color_marker = "#000000"  # marker line
-
-        # --- Case 1: Missing range entirely ---
-        if not ranges:
-            chart_max = max(numeric_value * 1.2, numeric_value + 1.0)
-            chart_max = chart_max if chart_max > 0 else 1.0
-            value_pct = min(max(numeric_value / chart_max, 0.0), 1.0)
-            marker_pos_x = value_pct * BAR_WIDTH
-
-            # Highlight the whole bar by status if available
-            fill_color = {
-                "high": color_high,
-                "low": color_low,
-                "normal": color_normal
-            }.get(status, "#E0E0E0")
-
-            return f'''
+    numeric_value = float(val_str)
+    ranges = parse_reference_range(reference_range)
+
+    # Default colors (fallback)
+    color_low = "#FF9999"     # light red/pink
+    color_normal = "#90EE90"  # light green
+    color_high = "#FFFF99"    # light yellow
+    color_marker = "#000000"  # marker line
+
+    # --- Case 1: Missing range entirely ---
+    if not ranges:
+        chart_max = max(numeric_value * 1.2, numeric_value + 1.0)
+        chart_max = chart_max if chart_max > 0 else 1.0
+        value_pct = min(max(numeric_value / chart_max, 0.0), 1.0)
+        marker_pos_x = value_pct * BAR_WIDTH
+
+        # Highlight the whole bar by status if available
+        fill_color = {
+            "high": color_high,
+            "low": color_low,
+            "normal": color_normal
+        }.get(status, "#E0E0E0")
+
+        return f'''
             <div class="chart-container" style="width:{BAR_WIDTH}px;height:{BAR_HEIGHT+20}px;">
                 <div class="bar-background" style="width:{BAR_WIDTH}px;height:{BAR_HEIGHT}px;background-color:{fill_color};border:0.25px solid #000;"></div>
                 <div class="marker" style="left:{marker_pos_x}px;height:{BAR_HEIGHT+6}px;border-left:1.5px solid {color_marker};"></div>
@@ -204,30 +225,30 @@ def generate_bar_chart_html(test_data, result_value, lang_code):
             </div>
             '''
 
-        # --- Case 2: Proper reference range ---
-        normal_min, normal_max = ranges.get('normal_min', 0), ranges.get('normal_max', 0)
-        if normal_max <= normal_min:
-            normal_max = normal_min + 1.0
-
-        # Extend range slightly for visualization
-        chart_min = min(normal_min, numeric_value, 0.0)
-        chart_max = max(normal_max, numeric_value)
-        span = chart_max - chart_min
-        chart_min -= 0.05 * span
-        chart_max += 0.05 * span
-
-        # Compute relative widths
-        total_span = chart_max - chart_min
-        low_width = max(0.5, (normal_min - chart_min) / total_span * 100)
-        normal_width = max(0.5, (normal_max - normal_min) / total_span * 100)
-        high_width = max(0.5, 100 - (low_width + normal_width))
-
-        # Compute marker position
-        marker_pct = min(max((numeric_value - chart_min) / total_span, 0.0), 1.0)
-        marker_pos_x = marker_pct * BAR_WIDTH
-
-        # Bar HTML with segments
-        return f'''
+    # --- Case 2: Proper reference range ---
+    normal_min, normal_max = ranges.get('normal_min', 0), ranges.get('normal_max', 0)
+    if normal_max <= normal_min:
+        normal_max = normal_min + 1.0
+
+    # Extend range slightly for visualization
+    chart_min = min(normal_min, numeric_value, 0.0)
+    chart_max = max(normal_max, numeric_value)
+    span = chart_max - chart_min
+    chart_min -= 0.05 * span
+    chart_max += 0.05 * span
+
+    # Compute relative widths
+    total_span = chart_max - chart_min
+    low_width = max(0.5, (normal_min - chart_min) / total_span * 100)
+    normal_width = max(0.5, (normal_max - normal_min) / total_span * 100)
+    high_width = max(0.5, 100 - (low_width + normal_width))
+
+    # Compute marker position
+    marker_pct = min(max((numeric_value - chart_min) / total_span, 0.0), 1.0)
+    marker_pos_x = marker_pct * BAR_WIDTH
+
+    # Bar HTML with segments
+    return f'''
         <div class="chart-container" style="width:{BAR_WIDTH}px;height:{BAR_HEIGHT+20}px;">
             <div class="bar-background" style="display:flex;width:100%;height:{BAR_HEIGHT}px;border:0.25px solid #000;">
                 <div class="bar-segment low" style="width:{low_width}%;background-color:{color_low};"></div>
@@ -239,16 +260,13 @@ def generate_bar_chart_html(test_data, result_value, lang_code):
         </div>
         '''
 
-    except Exception as e:
-        print(f"⚠️ Chart generation error for test '{test_data.get('name', '')}': {e}")
-        return f'<div class="chart-container"><span style="color:#808080;">Chart N/A</span></div>'
-
 
 
 def get_css(lang_code, font_family, letterhead_path):
     """Generates the CSS style sheet dynamically with letterhead on each page."""
     
-    ttf_file = FONT_MAP.get(lang_code, FONT_MAP["en"])[0]
+    # The @font-face must load the same file register_font_for_lang named, including the English fallback
+    font_uri = resolve_font(lang_code).uri
     direction = 'rtl' if lang_code == 'ur' else 'ltr'
     text_align = 'right' if lang_code == 'ur' else 'left'
     
@@ -256,7 +274,7 @@ def get_css(lang_code, font_family, letterhead_path):
     /* --- FONT DEFINITIONS --- */
     @font-face {{
         font-family: "{font_family}";
-        src: url('{ttf_file}');
+        src: url('{font_uri}');
         font-weight: normal;
         font-style: normal;
     }}
@@ -385,80 +403,41 @@ def get_css(lang_code, font_family, letterhead_path):
     '''
     return css
 
-def generate_report_html(translated_data, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png"):
-    """Generates the full HTML content with repeating letterhead on every page."""
-    
-    now = datetime.now().strftime('%B %d, %Y')
-    
-    # --- Header (runs on every page) ---
-    header_html = f'''
+# ------------------ HTML Templates ------------------
+# Static fragments of the report document. The skeleton (style block, header, footer and
+# title page) only depends on the language's labels, so it is formatted once and cached.
+_HEADER_TEMPLATE = '''
     <div id="page-header">
         <img src="{letterhead_path}" class="letterhead" alt="letterhead">
-        <h1>{labels.get("Health Report Summary", "Health Report Summary")}</h1>
+        <h1>{title}</h1>
     </div>
     '''
-    
-    footer_html = f'''
+
+_FOOTER_TEMPLATE = '''
     <div id="page-footer">
-        <span class="date">{labels.get('Generated on','Generated on')}: {now}</span>
+        <span class="date">{generated_on}: {now}</span>
         <span class="page-num">Page <span class="paged-counter"></span></span>
     </div>
     '''
-    
-    # --- Title Page ---
-    title_page_html = f'''
+
+_TITLE_PAGE_TEMPLATE = '''
     <div class="title-page">
-        <h1>{labels.get("Health Report Summary", "Health Report Summary")}</h1>
-        <h2>{labels.get("Confidential Medical Document", "Confidential Medical Document")}</h2>
+        <h1>{title}</h1>
+        <h2>{confidential}</h2>
 
         <div class="info-box">
-            <p><b>{labels.get('Language','Language')}:</b> {lang_name}</p>
-            <p><b>{labels.get('Generated on','Generated on')}:</b> {now}</p>
+            <p><b>{language}:</b> {lang_name}</p>
+            <p><b>{generated_on}:</b> {now}</p>
         </div>
     </div>
     '''
 
-    # --- Content ---
-    content_html = ""
-    for test in translated_data.get('tests', []):
-        status_class = f"status-{test.get('status','NA').title()}"
-        rows = [
-            (labels.get('Test','Test'), f"<b>{test['name']}</b>", False),
-            (labels.get('Result','Result'), f'<span class="{status_class}">{test["value"]} {test.get("unit","").strip()}</span>', False),
-            (labels.get('Status','Status'), f'<span class="{status_class}">{test.get("status","N/A")}</span>', False),
-            (labels.get('Reference','Reference'), test.get('reference_range','N/A'), False),
-            (labels.get('Chart','Chart'), generate_bar_chart_html(test, test['value'], lang_code), True)
-        ]
-        if 'meaning' in test and test['meaning']:
-            rows.append((labels.get('Meaning','Meaning'), test['meaning'], False))
-        if 'tips' in test and test['tips']:
-            rows.append((labels.get('Tips','Tips'), test['tips'], False))
-        
-        table_rows_html = "".join(
-            f'<tr><td class="test-key-col">{key}:</td><td>{value}</td></tr>' for key, value, _ in rows
-        )
-        
-        content_html += f'''
-        <table class="test-table">
-            <tbody>
-                {table_rows_html}
-            </tbody>
-        </table>
-        '''
-    
-    content_html += f'''
-    <p style="text-align: center; font-size: 8pt; color: #808080; margin-top: 20px;">
-        {labels.get("End of Report", "End of Report")}
-    </p>
-    '''
-
-    # --- Full HTML ---
-    html_doc = f'''
+_DOCUMENT_OPEN_TEMPLATE = '''
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="UTF-8">        
-        <title>{labels.get("Health Report Summary")}</title>
+        <title>{document_title}</title>
         <style>
             @page {{
                 size: A4;
@@ -531,50 +510,276 @@ def generate_report_html(translated_data, lang_code, lang_name, labels, font_fam
         {title_page_html}
 
         <div id="content">
-            {content_html}
+            '''
+
+_DOCUMENT_CLOSE = '''
         </div>
 
     </body>
     </html>
     '''
-    return html_doc
+
+_TABLE_OPEN = '''
+        <table class="test-table">
+            <tbody>
+                '''
+_TABLE_CLOSE = '''
+            </tbody>
+        </table>
+        '''
+_KEY_CELL_TEMPLATE = '<tr><td class="test-key-col">{}:</td><td>'
+_ROW_END = '</td></tr>'
+_ROW_LABELS = ("Test", "Result", "Status", "Reference", "Chart", "Meaning", "Tips")
+
+_END_OF_REPORT_TEMPLATE = '''
+    <p style="text-align: center; font-size: 8pt; color: #808080; margin-top: 20px;">
+        {end_of_report}
+    </p>
+    '''
+
+_skeleton_cache = {}
+
+def _report_skeleton(lang_name, labels, letterhead_path, now):
+    """
+    (document opening, document closing, row key cells) for a language, built once per
+    labels/letterhead/date. The key cells are the '<tr><td>Label:</td><td>' prefixes of each row.
+    """
+    key = (lang_name, tuple(sorted(labels.items())), letterhead_path, now)
+    skeleton = _skeleton_cache.get(key)
+    if skeleton is None:
+        title = labels.get("Health Report Summary", "Health Report Summary")
+        generated_on = labels.get('Generated on', 'Generated on')
+        header_html = _HEADER_TEMPLATE.format(title=title, letterhead_path=letterhead_path)
+        footer_html = _FOOTER_TEMPLATE.format(generated_on=generated_on, now=now)
+        title_page_html = _TITLE_PAGE_TEMPLATE.format(
+            title=title,
+            confidential=labels.get("Confidential Medical Document", "Confidential Medical Document"),
+            language=labels.get('Language', 'Language'), lang_name=lang_name, generated_on=generated_on, now=now)
+        document_open = _DOCUMENT_OPEN_TEMPLATE.format(
+            document_title=labels.get("Health Report Summary"), header_html=header_html,
+            footer_html=footer_html, title_page_html=title_page_html)
+        end_html = _END_OF_REPORT_TEMPLATE.format(end_of_report=labels.get("End of Report", "End of Report"))
+        if len(_skeleton_cache) >= 256:
+            _skeleton_cache.clear()
+        key_cells = {label: _KEY_CELL_TEMPLATE.format(labels.get(label, label)) for label in _ROW_LABELS}
+        skeleton = _skeleton_cache[key] = (document_open, end_html + _DOCUMENT_CLOSE, key_cells)
+    return skeleton
+
+def _render_test_table(test, key_cells, lang_code):
+    """One test's table; the fixed rows are a single f-string, the optional ones are joined on."""
+    status_class = f"status-{test.get('status','NA').title()}"
+    parts = [
+        f'{_TABLE_OPEN}'
+        f'{key_cells["Test"]}<b>{test["name"]}</b>{_ROW_END}'
+        f'{key_cells["Result"]}<span class="{status_class}">{test["value"]} {test.get("unit","").strip()}</span>{_ROW_END}'
+        f'{key_cells["Status"]}<span class="{status_class}">{test.get("status","N/A")}</span>{_ROW_END}'
+        f'{key_cells["Reference"]}{test.get("reference_range","N/A")}{_ROW_END}'
+        f'{key_cells["Chart"]}{generate_bar_chart_html(test, test["value"], lang_code)}{_ROW_END}'
+    ]
+    if test.get('meaning'):
+        parts += (key_cells["Meaning"], test['meaning'], _ROW_END)
+    if test.get('tips'):
+        parts += (key_cells["Tips"], test['tips'], _ROW_END)
+    parts.append(_TABLE_CLOSE)
+    return "".join(parts)
+
+def iter_report_html(translated_data, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png"):
+    """Yields the report HTML in chunks: the cached skeleton opening, one chunk per test, then the closing."""
+    now = datetime.now().strftime('%B %d, %Y')
+    document_open, document_close, key_cells = _report_skeleton(lang_name, labels, letterhead_path, now)
+    yield document_open
+    for test in translated_data.get('tests', []):
+        yield _render_test_table(test, key_cells, lang_code)
+    yield document_close
+
+def generate_report_html(translated_data, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png"):
+    """Generates the full HTML content with repeating letterhead on every page."""
+    return "".join(iter_report_html(translated_data, lang_code, lang_name, labels, font_family, letterhead_path))
 
 
 # ------------------ WeasyPrint Generator ------------------
-def generate_pdf_from_data_weasyprint(report_data, output_pdf_path, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png"):
-    
-    # 1. Get CSS and HTML
-    css_content = get_css(lang_code, font_family, "logo_img.png")
-    html_content = generate_report_html(report_data, lang_code, lang_name, labels, font_family, letterhead_path)
+def load_weasyprint():
+    """Import WeasyPrint once, on first use; raises ImportError/OSError if it or its native libraries are missing."""
+    global HTML, CSS, FontConfiguration
+    if HTML is None:
+        from weasyprint import HTML, CSS
+        from weasyprint.text.fonts import FontConfiguration
+    return HTML
+
+# ------------------ Output Optimization ------------------
+# The letterhead is drawn twice per page, as the @page background and by the running header's <img>.
+# Both resolve against the context's base_url to the same URL, so WeasyPrint loads it as one image and
+# writes a single image XObject that both draws on every page reference. Optimized output keeps that
+# layout, so pages look the same, and adds the image options below. WeasyPrint reads them while loading
+# images during HTML.render, so they are render options; the decoded letterhead is kept in the
+# context's image cache and reused by every render in the process.
+# Font subsetting and compressed streams need no options: they are WeasyPrint's defaults in both modes.
+PDF_OPTIMIZE_OPTIONS = {
+    "optimize_images": True,
+    "jpeg_quality": 85,
+    "dpi": 150,
+}
+
+class RenderContext:
+    """
+    Everything about a render that depends only on the language: the resolved font file, the
+    FontConfiguration and the parsed stylesheet. Built once per language and process.
+    With optimize, renders also pass PDF_OPTIMIZE_OPTIONS and a per-context image cache.
+    """
+    def __init__(self, lang_code, font_family, base_url=None, optimize=False):
+        start = time.perf_counter()
+        load_weasyprint()
+        self.lang_code = lang_code
+        self.font_family = font_family
+        self.base_url = base_url or os.getcwd()
+        self.font_path = resolve_font(lang_code).path
+        self.font_available = os.path.exists(self.font_path)
+        # WeasyPrint requires a FontConfiguration to manage font loading/caching; the stylesheet must be
+        # parsed against the same one so its @font-face rule is loaded, and both are reused by every render
+        self.font_config = FontConfiguration()
+        self.stylesheets = [CSS(string=get_css(lang_code, font_family, "logo_img.png"), base_url=self.base_url,
+                                font_config=self.font_config)]
+        self.optimize = optimize
+        self.render_options = dict(PDF_OPTIMIZE_OPTIONS, cache={}) if optimize else {}
+        self.setup_seconds = time.perf_counter() - start
+        self.renders = 0
+
+_render_contexts = {}
+
+def get_render_context(lang_code, font_family, optimize=False):
+    """Per-process cache of RenderContext objects, keyed by language, font family, working directory and mode."""
+    key = (lang_code, font_family, os.getcwd(), optimize)
+    context = _render_contexts.get(key)
+    if context is None:
+        context = _render_contexts[key] = RenderContext(lang_code, font_family, key[2], optimize)
+    return context
+
+def clear_render_contexts():
+    _render_contexts.clear()
+
+def render_pdf_weasyprint(report_data, output_pdf_path, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png",
+                          html_content=None, timings=None, optimize=False):
+    """
+    Renders one report PDF; raises on failure (see generate_pdf_from_data_weasyprint and render_pdf).
+    output_pdf_path may be a path, a writable binary stream, or None to get the PDF bytes back.
+    Pass html_content to skip HTML generation when it was already built (e.g. by the parent of a render pool),
+    and a dict as timings to receive the html/layout/serialize/write seconds.
+    optimize selects the size-optimized output (see PDF_OPTIMIZE_OPTIONS).
+    """
+    start = time.perf_counter()
+    # 1. Get the cached fonts/CSS and build the HTML
+    context = get_render_context(lang_code, font_family, optimize)
+    if html_content is None:
+        html_content = generate_report_html(report_data, lang_code, lang_name, labels, font_family, letterhead_path)
+    html_done = time.perf_counter()
     
+    # 2. Lay out and serialize the PDF
+    html = HTML(string=html_content, base_url=context.base_url)
+    document = html.render(stylesheets=context.stylesheets, font_config=context.font_config, **context.render_options)
+    layout_done = time.perf_counter()
+    pdf_bytes = document.write_pdf()
+    serialized = time.perf_counter()
+    context.renders += 1
+
+    # 3. Deliver it
+    if output_pdf_path is None:
+        result = pdf_bytes
+    elif hasattr(output_pdf_path, "write"):
+        output_pdf_path.write(pdf_bytes)
+        result = None
+    else:
+        with open(output_pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        result = None
+    if timings is not None:
+        timings.update(html=html_done - start, layout=layout_done - html_done,
+                       serialize=serialized - layout_done, write=time.perf_counter() - serialized)
+    return result
+
+# ------------------ In-memory / Stream / Sink Output ------------------
+@dataclass
+class RenderResult:
+    """Outcome of render_pdf: the PDF (or where it went), its size and timings, or the error."""
+    lang_code: str
+    success: bool
+    data: Optional[bytes] = None        # PDF bytes when rendered to memory
+    location: Optional[str] = None      # path or sink location when written out
+    size: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)  # html/layout/serialize/write/total seconds
+    error: Optional[str] = None
+
+class DirectorySink:
+    """
+    Local stand-in for an object store. Sinks implement put(name, data) -> location; writes here are
+    atomic (temporary file + rename), so readers never see a partial PDF.
+    """
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def put(self, name, data):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+def render_pdf(report_data, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png",
+               target=None, sink=None, name=None, html_content=None, optimize=False) -> RenderResult:
+    """
+    Renders one report without raising. The PDF goes to `target` (a path or writable binary stream),
+    to `sink.put(name, ...)`, or, with neither, comes back in result.data.
+    """
+    start = time.perf_counter()
+    timings = {}
     try:
-        # 2. Render PDF
-        base_dir = os.getcwd()
-        html = HTML(string=html_content, base_url=base_dir)
-        css = CSS(string=css_content)
-        
-        # WeasyPrint requires a FontConfiguration to manage font loading/caching
-        font_config = FontConfiguration()
-        html.write_pdf(output_pdf_path, stylesheets=[css], font_config=font_config)
-        
+        pdf_bytes = render_pdf_weasyprint(report_data, None, lang_code, lang_name, labels, font_family,
+                                          letterhead_path, html_content, timings, optimize)
+        write_start = time.perf_counter()
+        result = RenderResult(lang_code, True, size=len(pdf_bytes))
+        if sink is not None:
+            result.location = sink.put(name or f"health_report_{lang_code}.pdf", pdf_bytes)
+        elif target is None:
+            result.data = pdf_bytes
+        elif hasattr(target, "write"):
+            target.write(pdf_bytes)
+        else:
+            with open(target, "wb") as f:
+                f.write(pdf_bytes)
+            result.location = target
+        timings["write"] = time.perf_counter() - write_start
+    except Exception as e:
+        result = RenderResult(lang_code, False, error=f"{type(e).__name__}: {e}")
+    timings["total"] = time.perf_counter() - start
+    result.timings = timings
+    return result
+
+def generate_pdf_from_data_weasyprint(report_data, output_pdf_path, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png",
+                                      optimize=False):
+    try:
+        render_pdf_weasyprint(report_data, output_pdf_path, lang_code, lang_name, labels, font_family, letterhead_path,
+                              optimize=optimize)
         return True
     except Exception as e:
         print(f"❌ Error generating PDF with WeasyPrint: {str(e)}")
-        # Print a snippet of the generated HTML/CSS for debugging
-        # print("--- HTML Snippet ---")
-        # print(html_content[:1000]) 
-        # print("--- CSS Snippet ---")
-        # print(css_content)
         return False
 
 # ------------------ Multi-language PDF Runner (Modified) ------------------
-def generate_multilang_reports(json_file, output_folder, letterhead_path="logo_img.png"):
-    languages = {
-        "hi": "Hindi", "bn": "Bengali", "ta": "Tamil", "te": "Telugu",
-        "ml": "Malayalam", "gu": "Gujarati", "kn": "Kannada",
-        "pa": "Punjabi", "or": "Odia", "as": "Assamese", "ur": "Urdu"
-    }
+MULTILANG_LANGUAGES = {
+    "hi": "Hindi", "bn": "Bengali", "ta": "Tamil", "te": "Telugu",
+    "ml": "Malayalam", "gu": "Gujarati", "kn": "Kannada",
+    "pa": "Punjabi", "or": "Odia", "as": "Assamese", "ur": "Urdu"
+}
 
+def generate_multilang_reports(json_file, output_folder, letterhead_path="logo_img.png", render_workers=None, force=False,
+                               optimize=False):
     try:
         with open(json_file, 'r', encoding='utf-8') as f:
             report_data = json.load(f)
@@ -582,50 +787,502 @@ def generate_multilang_reports(json_file, output_folder, letterhead_path="logo_i
         print(f"❌ Error: Could not load or parse '{json_file}'.")
         return
 
+    return generate_multilang_reports_from_data(report_data, output_folder, letterhead_path, render_workers=render_workers,
+                                                force=force, optimize=optimize)
+
+def translate_report_for_languages(report_data, lang_codes, translator=None, max_workers=None):
+    """
+    Translates the report into every language concurrently (translation is network-bound), so
+    wall time tracks the slowest language rather than the sum. The translator's backend applies
+    the concurrency cap, rate limit and retries. Returns {lang_code: (labels, translated_data)}.
+    """
+    translator = translator or get_default_translator()
+    lang_codes = list(lang_codes)
+    if not lang_codes:
+        return {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(lang_codes)) as pool:
+        results = pool.map(lambda lang_code: translate_report_data(report_data, lang_code, translator), lang_codes)
+        return dict(zip(lang_codes, results))
+
+# ------------------ Parallel Rendering ------------------
+# WeasyPrint layout is CPU-bound, so per-language renders go to a process pool.
+def _init_render_worker(lang_codes, optimize=False):
+    """
+    Pre-warm a render worker: load every language's fonts and stylesheet for the pool's output mode,
+    and bring up Pango/fontconfig once.
+    """
+    for lang_code in lang_codes:
+        get_render_context(lang_code, register_font_for_lang(lang_code), optimize)
+    try:
+        load_weasyprint()(string="<p>warm-up</p>").write_pdf()
+    except Exception:
+        pass
+
+def _render_job(job):
+    """
+    Worker entry point: renders one language and reports the outcome instead of raising.
+    A job without an output path gets the PDF bytes back in result["data"].
+    """
+    report_data, output_pdf, lang_code, lang_name, labels, font_family, letterhead_path = job[:7]
+    html_content = job[7] if len(job) > 7 else None
+    optimize = job[8] if len(job) > 8 else False
+    result = render_pdf(report_data, lang_code, lang_name, labels, font_family, letterhead_path,
+                        target=output_pdf, html_content=html_content, optimize=optimize)
+    return {"lang_code": lang_code, "lang_name": lang_name, "output": output_pdf, "font_family": font_family,
+            "success": result.success, "error": result.error, "seconds": result.timings["total"],
+            "size": result.size, "timings": result.timings, "data": result.data}
+
+def create_render_pool(workers=None, lang_codes=None, optimize=False):
+    """
+    Process pool of pre-warmed render workers; reuse one across patients to pay the warm-up once.
+    optimize pre-warms the size-optimized render contexts instead of the default ones.
+    """
+    lang_codes = list(lang_codes or MULTILANG_LANGUAGES)
+    workers = workers or min(len(lang_codes), os.cpu_count() or 1)
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker, initargs=(lang_codes, optimize))
+
+def render_languages(jobs, render_pool=None, workers=None):
+    """
+    Renders (report_data, output_pdf, lang_code, lang_name, labels, font_family, letterhead_path[, html_content[, optimize]])
+    jobs.
+    Uses render_pool if given, otherwise a temporary pool (or the current process for workers == 1).
+    Returns {lang_code: result} with success/error/seconds per language. A broken render_pool raises
+    BrokenProcessPool instead, so its owner can replace it.
+    """
+    if render_pool is None and (workers == 1 or len(jobs) <= 1):
+        return {job[2]: _render_job(job) for job in jobs}
+
+    owned_pool = render_pool is None
+    pool = render_pool or create_render_pool(workers, [job[2] for job in jobs], any(len(job) > 8 and job[8] for job in jobs))
+    try:
+        futures = {pool.submit(_render_job, job): job for job in jobs}
+        results = {}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                results[job[2]] = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. BrokenProcessPool); a caller's pool is theirs to replace
+                if isinstance(e, BrokenExecutor) and not owned_pool:
+                    raise
+                results[job[2]] = {"lang_code": job[2], "lang_name": job[3], "output": job[1], "font_family": job[5],
+                                   "success": False, "error": f"{type(e).__name__}: {e}", "seconds": None,
+                                   "size": 0, "timings": {}, "data": None}
+        return results
+    finally:
+        if owned_pool:
+            pool.shutdown()
+
+# ------------------ Incremental Regeneration ------------------
+# A manifest next to the outputs records, per language, a hash of everything that goes into the PDF.
+# Languages whose hash is unchanged (and whose PDF still exists) are not rendered again.
+# Bump REPORT_TEMPLATE_VERSION when rendering code changes in a way the template strings do not show.
+# The "Generated on" date is deliberately not part of the hash.
+REPORT_TEMPLATE_VERSION = "1"
+RENDER_MANIFEST_NAME = ".render_manifest.json"
+_TEMPLATE_FINGERPRINT = hashlib.sha256("\0".join([
+    REPORT_TEMPLATE_VERSION, _HEADER_TEMPLATE, _FOOTER_TEMPLATE, _TITLE_PAGE_TEMPLATE, _DOCUMENT_OPEN_TEMPLATE,
+    _DOCUMENT_CLOSE, _TABLE_OPEN, _TABLE_CLOSE, _KEY_CELL_TEMPLATE, _ROW_END, _END_OF_REPORT_TEMPLATE
+]).encode("utf-8")).hexdigest()
+
+_file_digests = {}
+
+def _file_digest(path):
+    """SHA-256 of a file, memoized on (path, size, mtime); None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _file_digests.get(key)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = _file_digests[key] = hashlib.sha256(f.read()).hexdigest()
+    return digest
+
+def language_render_hash(lang_code, lang_name, labels, translated_data, font_family, letterhead_path="logo_img.png",
+                         optimize=False):
+    """Content hash of one language's PDF inputs: translated data, labels, CSS, template, font, letterhead and output mode."""
+    font = resolve_font(lang_code)
+    payload = json.dumps([
+        _TEMPLATE_FINGERPRINT, lang_code, lang_name, labels, translated_data, font_family,
+        get_css(lang_code, font_family, "logo_img.png"),
+        PDF_OPTIMIZE_OPTIONS if optimize else None,
+        font.sha256 if font.available else None,
+        letterhead_path, _file_digest(letterhead_path), _file_digest("logo_img.png")
+    ], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class RenderManifest:
+    """{lang_code: {"hash", "output", "size", "rendered_at"}} stored as .render_manifest.json in the output folder"""
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, RENDER_MANIFEST_NAME)
+        self.languages = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.languages = json.load(f).get("languages", {})
+        except (OSError, ValueError):
+            pass
+
+    def is_current(self, lang_code, content_hash, output_pdf):
+        entry = self.languages.get(lang_code)
+        return bool(entry) and entry.get("hash") == content_hash and os.path.exists(output_pdf)
+
+    def record(self, lang_code, content_hash, output_pdf, size=None):
+        self.languages[lang_code] = {"hash": content_hash, "output": os.path.basename(output_pdf), "size": size,
+                                     "rendered_at": datetime.now().isoformat(timespec="seconds")}
+
+    def forget(self, lang_code):
+        self.languages.pop(lang_code, None)
+
+    def save(self):
+        folder = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "languages": self.languages}, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def generate_multilang_reports_from_data(report_data, output_folder, letterhead_path="logo_img.png", languages=None,
+                                         translate_workers=None, render_pool=None, render_workers=None, force=False,
+                                         optimize=False):
+    """
+    Translates and renders every language. Languages whose inputs are unchanged since the last run
+    (see RenderManifest) are skipped unless force is set. optimize selects the size-optimized output.
+    "en" may be included; it renders the untranslated report data.
+    """
+    languages = languages or MULTILANG_LANGUAGES
     os.makedirs(output_folder, exist_ok=True)
+    manifest = RenderManifest(output_folder)
 
+    # Translate labels (titles) and test data content for all languages up front
+    translated_codes = [lang_code for lang_code in languages if lang_code != "en"]
+    translations = translate_report_for_languages(report_data, translated_codes, max_workers=translate_workers)
+    if "en" in languages:
+        translations["en"] = (get_translated_labels("en"), report_data)
+
+    jobs = []
+    hashes = {}
+    results = {}
     for lang_code, lang_name in languages.items():
         # 1. Get Language-Specific Font Family Name and Register
         font_family = register_font_for_lang(lang_code)
 
-        # 2. Get Translated Labels (titles)
-        labels = get_translated_labels(lang_code)
-
-        # 3. Translate test data content
-        translated_data = {"tests": []}
-        for test in report_data.get("tests", []):
-            translated_test = {
-                "name": translate_text(test["name"], lang_code),
-                "value": test["value"],
-                "unit": test.get("unit", ""),
-                "status": translate_text(test.get("status", ""), lang_code),
-                "reference_range": test.get("reference_range", ""),
-                "meaning": translate_text(test.get("meaning", ""), lang_code) if test.get("meaning") else "",
-                "tips": translate_text(test.get("tips", ""), lang_code) if test.get("tips") else ""
-            }
-            translated_data["tests"].append(translated_test)
+        # 2-3. Translated labels (titles) and test data content
+        labels, translated_data = translations[lang_code]
 
         output_pdf = f"{output_folder}/health_report_{lang_code}.pdf"
-        
-        # 4. Generate PDF using WeasyPrint
-        success = generate_pdf_from_data_weasyprint(translated_data, output_pdf, lang_code, lang_name, labels, font_family, letterhead_path)
-        
-        if success:
-            print(f"✅ Generated {lang_name} report: {output_pdf} using font: {font_family}")
+        hashes[lang_code] = language_render_hash(lang_code, lang_name, labels, translated_data, font_family, letterhead_path,
+                                                 optimize)
+        if not force and manifest.is_current(lang_code, hashes[lang_code], output_pdf):
+            results[lang_code] = {"lang_code": lang_code, "lang_name": lang_name, "output": output_pdf,
+                                  "font_family": font_family, "success": True, "skipped": True, "error": None,
+                                  "seconds": 0.0, "size": os.path.getsize(output_pdf), "timings": {}, "data": None}
+            continue
+        # HTML is built here so the memoized chart fragments are shared by every language
+        html_content = generate_report_html(translated_data, lang_code, lang_name, labels, font_family, letterhead_path)
+        jobs.append((None, output_pdf, lang_code, lang_name, labels, font_family, letterhead_path, html_content, optimize))
+
+    # 4. Generate PDFs using WeasyPrint, one language per worker
+    if jobs:
+        results.update(render_languages(jobs, render_pool, render_workers))
+    for lang_code in languages:
+        result = results[lang_code]
+        if result.get("skipped"):
+            print(f"⏭️ Unchanged {result['lang_name']} report: {result['output']}")
+        elif result["success"]:
+            manifest.record(lang_code, hashes[lang_code], result["output"], result.get("size"))
+            print(f"✅ Generated {result['lang_name']} report: {result['output']} using font: {result['font_family']}")
+        else:
+            manifest.forget(lang_code)
+            print(f"❌ Failed to generate {result['lang_name']} report: {result['error']}")
+    manifest.save()
+
+    if translated_codes:
+        stats = get_default_translator().stats()
+        print(f"🌐 Translation memory: {stats['hit_rate']:.0%} hit rate, "
+              f"{stats['backend_calls']} {stats['backend']} calls, {stats['entries']} cached strings")
+    return results
+
+def generate_english_report(report_data, output_folder, letterhead_path="logo_img.png", optimize=False, force=False):
+    """Renders health_report_en.pdf in-process, skipped like the other languages when the manifest shows it is current."""
+    results = generate_multilang_reports_from_data(report_data, output_folder, letterhead_path, {"en": "English"},
+                                                   render_workers=1, force=force, optimize=optimize)
+    return results["en"]["success"]
+
+# ------------------ NDJSON Input ------------------
+def iter_report_records(ndjson_path):
+    """Lazily yield report dicts from an NDJSON file ('-' for stdin), one record per line."""
+    f = sys.stdin if ndjson_path == "-" else open(ndjson_path, 'r', encoding='utf-8')
+    try:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                print(f"⚠️ Skipping malformed record on line {line_number}: {e}")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def _record_folder_name(record, index):
+    registration = (record.get("patient_info") or {}).get("registration_number") or ""
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', registration).strip('_')
+    return f"{index:06d}_{slug}" if slug else f"{index:06d}"
+
+def generate_reports_from_ndjson(ndjson_path, output_folder, letterhead_path="logo_img.png", render_workers=None, force=False,
+                                 optimize=False):
+    """Render every record of an NDJSON stream, one sub-folder per patient, without loading the whole file."""
+    count = 0
+    with create_render_pool(render_workers, optimize=optimize) as render_pool:
+        for index, report_data in enumerate(iter_report_records(ndjson_path), start=1):
+            patient_folder = os.path.join(output_folder, _record_folder_name(report_data, index))
+            os.makedirs(patient_folder, exist_ok=True)
+            print(f"\n--- Patient {index}: {patient_folder} ---")
+            generate_english_report(report_data, patient_folder, letterhead_path, optimize, force)
+            generate_multilang_reports_from_data(report_data, patient_folder, letterhead_path, render_pool=render_pool,
+                                                 force=force, optimize=optimize)
+            count += 1
+    print(f"\nProcessed {count} record(s) from {ndjson_path}")
+    return count
+
+# ------------------ Merged Batch Rendering ------------------
+# Many patients are laid out as one document per language, so WeasyPrint's stylesheet cascade and
+# font setup are paid once per batch. The running header is defined once for the whole document;
+# each patient starts on a new page with an anchor, and the rendered pages are split back into
+# per-patient PDFs on those anchors. Records can come from an NDJSON file, read lazily per language.
+BATCH_LANGUAGES = dict(en="English", **MULTILANG_LANGUAGES)
+
+_PATIENT_OPEN_TEMPLATE = '''
+        <div class="patient-report" id="{anchor}"{style}>
+        '''
+_PATIENT_CLOSE = '''
+        </div>
+        '''
+
+def patient_anchor(index):
+    return f"patient-{index}"
+
+def patient_label(report_data, index):
+    """Name (and registration number) shown in a patient's running header, or 'Patient N'."""
+    info = report_data.get("patient_info") or {}
+    parts = [part for part in (info.get("name"), info.get("registration_number")) if part]
+    return " / ".join(parts) if parts else f"Patient {index + 1}"
+
+def iter_batch_report_html(patients, lang_code, lang_name, labels, font_family, letterhead_path="logo_img.png"):
+    """
+    Yields one HTML document for many patients, an iterable of (label, translated_data) consumed
+    lazily. The running header is defined once; each patient gets a page break, an anchor
+    (patient_anchor(i)), a title page naming them and an end marker.
+    """
+    now = datetime.now().strftime('%B %d, %Y')
+    _, _, key_cells = _report_skeleton(lang_name, labels, letterhead_path, now)
+    title = labels.get("Health Report Summary", "Health Report Summary")
+    generated_on = labels.get('Generated on', 'Generated on')
+    end_html = _END_OF_REPORT_TEMPLATE.format(end_of_report=labels.get("End of Report", "End of Report"))
+
+    yield _DOCUMENT_OPEN_TEMPLATE.format(
+        document_title=labels.get("Health Report Summary"),
+        header_html=_HEADER_TEMPLATE.format(title=title, letterhead_path=letterhead_path),
+        footer_html=_FOOTER_TEMPLATE.format(generated_on=generated_on, now=now), title_page_html="")
+    for index, (label, translated_data) in enumerate(patients):
+        yield _PATIENT_OPEN_TEMPLATE.format(anchor=patient_anchor(index),
+                                            style=' style="break-before: page;"' if index else "")
+        yield _TITLE_PAGE_TEMPLATE.format(
+            title=f"{title}<br>{label}",
+            confidential=labels.get("Confidential Medical Document", "Confidential Medical Document"),
+            language=labels.get('Language', 'Language'), lang_name=lang_name, generated_on=generated_on, now=now)
+        for test in translated_data.get('tests', []):
+            yield _render_test_table(test, key_cells, lang_code)
+        yield end_html
+        yield _PATIENT_CLOSE
+    yield _DOCUMENT_CLOSE
+
+def split_document_by_patient(document, count):
+    """Per-patient Document copies, cut at the page holding each patient's anchor."""
+    starts = {}
+    for page_index, page in enumerate(document.pages):
+        for anchor in page.anchors:
+            starts.setdefault(anchor, page_index)
+    missing = [patient_anchor(i) for i in range(count) if patient_anchor(i) not in starts]
+    if missing:
+        raise ValueError(f"patient anchors not found in rendered document: {', '.join(missing)}")
+    boundaries = [starts[patient_anchor(i)] for i in range(count)] + [len(document.pages)]
+    return [document.copy(document.pages[start:end]) for start, end in zip(boundaries, boundaries[1:])]
+
+def render_merged_batch(reports, lang_code, lang_name, output_folder, letterhead_path="logo_img.png",
+                        split=True, folder_names=None, optimize=False):
+    """
+    Renders all reports for one language in a single layout pass. reports is a list of report dicts or
+    the path of an NDJSON file, read one record at a time. Writes <output_folder>/batch_<lang>.pdf
+    and, with split, <output_folder>/<patient folder>/health_report_<lang>.pdf for each patient.
+    Returns a result dict with the paths, page count and timings; raises on failure.
+    """
+    start = time.perf_counter()
+    font_family = register_font_for_lang(lang_code)
+    labels = get_translated_labels(lang_code)
+    records = iter_report_records(reports) if isinstance(reports, str) else reports
+    record_folders = []
+
+    def patients():
+        for i, report in enumerate(records):
+            record_folders.append(_record_folder_name(report, i + 1))
+            translated_data = report if lang_code == "en" else translate_report_data(report, lang_code)[1]
+            yield patient_label(report, i), translated_data
+
+    html_content = "".join(iter_batch_report_html(patients(), lang_code, lang_name, labels, font_family, letterhead_path))
+    html_done = time.perf_counter()
+
+    context = get_render_context(lang_code, font_family, optimize)
+    document = HTML(string=html_content, base_url=context.base_url).render(
+        stylesheets=context.stylesheets, font_config=context.font_config, **context.render_options)
+    layout_done = time.perf_counter()
+
+    os.makedirs(output_folder, exist_ok=True)
+    merged_pdf = os.path.join(output_folder, f"batch_{lang_code}.pdf")
+    document.write_pdf(merged_pdf)
+    patient_pdfs = []
+    if split:
+        folder_names = folder_names or record_folders
+        for folder_name, patient_document in zip(folder_names, split_document_by_patient(document, len(record_folders))):
+            patient_folder = os.path.join(output_folder, folder_name)
+            os.makedirs(patient_folder, exist_ok=True)
+            patient_pdf = os.path.join(patient_folder, f"health_report_{lang_code}.pdf")
+            patient_document.write_pdf(patient_pdf)
+            patient_pdfs.append(patient_pdf)
+    return {"lang_code": lang_code, "lang_name": lang_name, "merged": merged_pdf, "patients": patient_pdfs,
+            "patient_count": len(record_folders), "pages": len(document.pages), "font_family": font_family,
+            "timings": {"html": html_done - start, "layout": layout_done - html_done,
+                        "write": time.perf_counter() - layout_done}}
+
+def _render_merged_job(job):
+    try:
+        result = render_merged_batch(*job)
+        result.update(success=True, error=None)
+    except Exception as e:
+        result = {"lang_code": job[1], "lang_name": job[2], "success": False, "error": f"{type(e).__name__}: {e}"}
+    return result
+
+def generate_merged_batch_reports(reports, output_folder, letterhead_path="logo_img.png", languages=None,
+                                  split=True, render_pool=None, render_workers=None, optimize=False):
+    """
+    Merged rendering for every language, one language per render worker. reports is a list of report
+    dicts or an NDJSON path that each language job reads lazily. Returns {lang_code: result}.
+    """
+    languages = languages or BATCH_LANGUAGES
+    jobs = [(reports, lang_code, lang_name, output_folder, letterhead_path, split, None, optimize)
+            for lang_code, lang_name in languages.items()]
+
+    if render_pool is None and (render_workers == 1 or len(jobs) <= 1):
+        results = {job[1]: _render_merged_job(job) for job in jobs}
+    else:
+        owned_pool = render_pool is None
+        pool = render_pool or create_render_pool(render_workers, languages, optimize)
+        try:
+            futures = {pool.submit(_render_merged_job, job): job for job in jobs}
+            results = {}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    results[job[1]] = future.result()
+                except Exception as e:
+                    results[job[1]] = {"lang_code": job[1], "lang_name": job[2], "success": False,
+                                       "error": f"{type(e).__name__}: {e}"}
+        finally:
+            if owned_pool:
+                pool.shutdown()
+
+    for lang_code in languages:
+        result = results[lang_code]
+        if result["success"]:
+            print(f"✅ {result['lang_name']}: {result['patient_count']} patient(s), {result['pages']} page(s) -> {result['merged']}"
+                  f" (layout {result['timings']['layout']:.2f}s)")
         else:
-            print(f"❌ Failed to generate {lang_name} report")
+            print(f"❌ Failed to render merged {result['lang_name']} batch: {result['error']}")
+    return results
+
+# ------------------ Output Size Report ------------------
+def compare_output_sizes(report_data, languages=None, letterhead_path="logo_img.png"):
+    """
+    Renders each language in the default and the optimized output mode and prints the PDF sizes.
+    Returns {lang_code: (default_bytes, optimized_bytes)}.
+    """
+    languages = languages or BATCH_LANGUAGES
+    translations = translate_report_for_languages(report_data, [code for code in languages if code != "en"])
+    translations["en"] = (get_translated_labels("en"), report_data)
+    sizes = {}
+    print(f"{'Language':<12}{'default':>12}{'optimized':>12}{'saved':>8}")
+    for lang_code, lang_name in languages.items():
+        labels, translated_data = translations[lang_code]
+        font_family = register_font_for_lang(lang_code)
+        html_content = generate_report_html(translated_data, lang_code, lang_name, labels, font_family, letterhead_path)
+        before, after = (len(render_pdf_weasyprint(None, None, lang_code, lang_name, labels, font_family, letterhead_path,
+                                                   html_content, optimize=optimize)) for optimize in (False, True))
+        sizes[lang_code] = (before, after)
+        print(f"{lang_name:<12}{before:>12,}{after:>12,}{1 - after / before:>8.0%}")
+    total_before, total_after = (sum(size[i] for size in sizes.values()) for i in (0, 1))
+    if total_before:
+        print(f"{'Total':<12}{total_before:>12,}{total_after:>12,}{1 - total_after / total_before:>8.0%}")
+    return sizes
 
 # ------------------ Main (WeasyPrint) ------------------
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate multi-language health report PDFs.")
+    parser.add_argument("--ndjson", default=None, metavar="PATH",
+                        help="Render every record of an NDJSON file ('-' for stdin) produced by pdf_processor --ndjson")
+    parser.add_argument("-w", "--render-workers", type=int, default=None,
+                        help="Processes used to render languages in parallel (default: one per language, up to CPU count)")
+    parser.add_argument("--merge", action="store_true",
+                        help="With --ndjson, lay out all records as one document per language and split it per patient")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Size-optimized output: recompressed, downsampled images; same page layout and letterhead")
+    parser.add_argument("--size-report", action="store_true",
+                        help="Render the sample report in both output modes and print the PDF size per language")
+    parser.add_argument("--force", action="store_true",
+                        help="Re-render every language even if its inputs match the output folder's manifest")
+    args = parser.parse_args(argv)
+
     json_file = "health_report_data.json"
     output_folder = "reports_multilang_weasyprint"
     
-    if not HTML:
+    try:
+        load_weasyprint()
+    except (ImportError, OSError):
         print("\nExiting. WeasyPrint library (or its underlying dependencies cairo/pango/gi) is missing or could not be loaded.")
         return
 
+    # Surface missing fonts before any rendering starts
+    report_missing_fonts(FONT_REGISTRY)
     os.makedirs(output_folder, exist_ok=True)
 
+    if args.ndjson and args.merge:
+        if args.ndjson != "-":
+            generate_merged_batch_reports(args.ndjson, output_folder, render_workers=args.render_workers,
+                                          optimize=args.optimize)
+            return
+        # Every language reads the records again, so stdin is copied to a file first
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', suffix=".ndjson", delete=False) as f:
+            for line in sys.stdin:
+                f.write(line)
+        try:
+            generate_merged_batch_reports(f.name, output_folder, render_workers=args.render_workers,
+                                          optimize=args.optimize)
+        finally:
+            os.remove(f.name)
+        return
+
+    if args.ndjson:
+        generate_reports_from_ndjson(args.ndjson, output_folder, render_workers=args.render_workers, force=args.force,
+                                     optimize=args.optimize)
+        return
+
+    if args.size_report:
+        with open(json_file, 'r', encoding='utf-8') as f:
+            compare_output_sizes(json.load(f))
+        return
+
     # Create dummy data file if it doesn't exist (same as previous setup)
     if not os.path.exists(json_file):
         print(f"Creating dummy data file: {json_file}")
@@ -666,21 +1323,19 @@ def main():
 
     # English PDF first
     print("\n--- Generating English Report ---")
-    en_font_family = register_font_for_lang("en")
     try:
         with open(json_file, 'r', encoding='utf-8') as f:
             report_data = json.load(f)
-        labels = get_translated_labels("en")
-        success_en = generate_pdf_from_data_weasyprint(report_data, f"{output_folder}/health_report_en.pdf", "en", "English", labels, en_font_family, letterhead_path="logo_img.png")
-        if success_en:
-            print(f"✅ Generated English report: {output_folder}/health_report_en.pdf using font: {en_font_family}")
+        generate_english_report(report_data, output_folder, letterhead_path="logo_img.png", optimize=args.optimize,
+                                force=args.force)
     except Exception as e:
         print(f"Exiting main: Could not load or process '{json_file}'. Error: {e}")
         return
 
     # Generate multi-language reports
     print("\n--- Generating Multi-Language Reports ---")
-    generate_multilang_reports(json_file, output_folder)
+    generate_multilang_reports(json_file, output_folder, render_workers=args.render_workers, force=args.force,
+                               optimize=args.optimize)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,21 @@
-import PyPDF2
-import pdfplumber
 import re
-from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Tuple
+import os
+import sys
+import glob
+import argparse
+from dataclasses import dataclass, field, asdict
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple, Iterable, Iterator
 import json
+import hashlib
+import tempfile
+import functools
+from array import array
+from itertools import chain
 
-@dataclass
+if TYPE_CHECKING:
+    import numpy
+
+@dataclass(slots=True)
 class TestResult:
     name: str
     value: str
@@ -27,6 +37,7 @@ class PatientReport:
     lab_name: Optional[str] = None
     pathologist: Optional[str] = None
     
+    # Each section is a list of TestResult, or a TestResultTable once compacted
     hematology_tests: List[TestResult] = field(default_factory=list)
     biochemistry_tests: List[TestResult] = field(default_factory=list)
     serology_tests: List[TestResult] = field(default_factory=list)
@@ -37,106 +48,673 @@ class PatientReport:
     peripheral_smear_findings: List[str] = field(default_factory=list)
     clinical_notes: List[str] = field(default_factory=list)
 
-class PathologyReportExtractor:
+    def all_tests(self) -> Iterator[TestResult]:
+        return chain(self.hematology_tests, self.biochemistry_tests,
+                     self.serology_tests, self.clinical_pathology_tests)
+
+    def compact(self) -> "PatientReport":
+        """Replace each test list with a columnar TestResultTable, in place"""
+        for section in TEST_SECTIONS:
+            tests = getattr(self, section)
+            if not isinstance(tests, TestResultTable):
+                setattr(self, section, TestResultTable.from_results(tests))
+        return self
+
+TEST_SECTIONS = ("hematology_tests", "biochemistry_tests", "serology_tests", "clinical_pathology_tests")
+
+# ------------------ Columnar Results ------------------
+class _DictionaryColumn:
+    """String column storing each distinct (interned) value once and a code per row"""
+    __slots__ = ("values", "codes", "_lookup")
+
+    def __init__(self, typecode: str):
+        self.values = []
+        self.codes = array(typecode)
+        self._lookup = {}
+
+    def append(self, value: str):
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        self.codes.append(code)
+
+    def __getitem__(self, row: int) -> str:
+        return self.values[self.codes[row]]
+
+def _canonical_number(number: float) -> str:
+    text = repr(number)
+    return text[:-2] if text.endswith(".0") else text
+
+class TestResultTable:
+    """
+    Columnar store for many TestResults: dictionary-encoded names, units, ranges and statuses,
+    values as a float array. Value text that does not round-trip from the float (e.g. 'Negative',
+    '16.20') is kept in a sparse override map, so iterating gives back the exact TestResults.
+    """
+    __slots__ = ("names", "units", "reference_ranges", "statuses", "values", "_value_text")
+
     def __init__(self):
+        self.names = _DictionaryColumn("I")
+        self.units = _DictionaryColumn("H")
+        self.reference_ranges = _DictionaryColumn("I")
+        self.statuses = _DictionaryColumn("B")
+        self.values = array("d")
+        self._value_text = {}
+
+    @classmethod
+    def from_results(cls, results: Iterable[TestResult]) -> "TestResultTable":
+        table = cls()
+        table.extend(results)
+        return table
+
+    def append(self, result: TestResult):
+        row = len(self.values)
+        value = result.value
+        number = float("nan")
+        if value.replace(".", "", 1).isdecimal():
+            number = float(value)
+        if number != number or _canonical_number(number) != value:
+            self._value_text[row] = sys.intern(value)
+        self.values.append(number)
+        self.names.append(result.name)
+        self.units.append(result.unit)
+        self.reference_ranges.append(result.reference_range)
+        self.statuses.append(result.status)
+
+    def extend(self, results: Iterable[TestResult]):
+        for result in results:
+            self.append(result)
+
+    def value_text(self, row: int) -> str:
+        text = self._value_text.get(row)
+        return text if text is not None else _canonical_number(self.values[row])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, row: int) -> TestResult:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("TestResultTable index out of range")
+        return TestResult(
+            name=self.names[row],
+            value=self.value_text(row),
+            unit=self.units[row],
+            reference_range=self.reference_ranges[row],
+            status=self.statuses[row]
+        )
+
+    def __iter__(self) -> Iterator[TestResult]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def to_list(self) -> List[TestResult]:
+        return list(self)
+
+_REGEX_SPECIAL = frozenset(".^$*+?{}[]\\|()")
+
+def _literal_prefix(pattern: str) -> str:
+    """Literal text every match of pattern starts with ("" if there is none, e.g. a top-level |)"""
+    depth, in_class, i = 0, False, 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            in_class = True
+        elif char in "()":
+            depth += 1 if char == "(" else -1
+        elif char == "|" and depth == 0:
+            return ""
+        i += 1
+
+    prefix, i = [], 0
+    while i < len(pattern):
+        char, width = pattern[i], 1
+        if char == "\\":
+            # Escaped punctuation is literal; \s, \d, \b and friends end the prefix
+            if i + 1 >= len(pattern) or pattern[i + 1].isalnum():
+                break
+            char, width = pattern[i + 1], 2
+        elif char in _REGEX_SPECIAL:
+            break
+        if pattern[i + width:i + width + 1] in ("*", "?", "{"):
+            break
+        prefix.append(char)
+        i += width
+    return "".join(prefix)
+
+class TestPatternScanner:
+    """
+    A table of (pattern, test name) compiled once, on first scan, and matched against a section.
+    Returns the first match per test, in table order, exactly like re.search per pattern.
+    scan() makes one pass over the text: a single alternation of every test's literal label
+    (e.g. "M.C.H.") finds candidate positions, and only the tests behind the label found there
+    are tried with match(). Patterns without a literal label are searched on their own.
+    """
+    def __init__(self, patterns: List[Tuple[str, str]]):
+        self.patterns = patterns
+        self._tests = None
+
+    @property
+    def tests(self) -> List[Tuple[str, "re.Pattern"]]:
+        # Compiling every table costs tens of milliseconds, so it is kept out of module import
+        if self._tests is None:
+            self._compile()
+        return self._tests
+
+    def _compile(self):
+        by_label, unlabelled = {}, []
+        for index, (pattern, _name) in enumerate(self.patterns):
+            label = _literal_prefix(pattern)
+            if label:
+                by_label.setdefault(label, []).append(index)
+            else:
+                unlabelled.append(index)
+        # Longest first, so "M.C.H.C." wins over "M.C.H." at the same position
+        labels = sorted(by_label, key=len, reverse=True)
+        # A label consumed by finditer can hide another one that starts inside it
+        # ("M.C.H." inside "M.C.H.C.", "PT" inside "APTT"); keep those as (offset, label)
+        hidden = {}
+        for label in labels:
+            hidden[label] = [
+                (offset, other) for offset in range(len(label)) for other in labels
+                if (offset or other != label) and (other.startswith(label[offset:]) or label[offset:].startswith(other))
+            ]
+        self._by_label = by_label
+        self._unlabelled = unlabelled
+        self._hidden = hidden
+        self._labels_re = re.compile("|".join(map(re.escape, labels))) if labels else None
+        self._tests = [(name, re.compile(pattern)) for pattern, name in self.patterns]
+
+    def scan(self, text: str, pos: int = 0, endpos: Optional[int] = None) -> List[Tuple[str, "re.Match"]]:
+        tests = self.tests
+        if endpos is None:
+            endpos = len(text)
+        found = {}
+        for index in self._unlabelled:
+            match = tests[index][1].search(text, pos, endpos)
+            if match:
+                found[index] = match
+
+        remaining = len(tests) - len(found)
+        if self._labels_re is not None and remaining:
+            by_label, hidden = self._by_label, self._hidden
+            for hit in self._labels_re.finditer(text, pos, endpos):
+                start, label = hit.start(), hit.group()
+                candidates = [(start, label)]
+                for offset, other in hidden[label]:
+                    if text.startswith(other, start + offset, endpos):
+                        candidates.append((start + offset, other))
+                for at, candidate in candidates:
+                    for index in by_label[candidate]:
+                        if index not in found:
+                            match = tests[index][1].match(text, at, endpos)
+                            if match:
+                                found[index] = match
+                                remaining -= 1
+                if not remaining:
+                    break
+        return [(tests[index][0], found[index]) for index in sorted(found)]
+
+# ------------------ Section Index ------------------
+# Section name -> header markers that end it (a section never ends on its own header)
+SECTION_TERMINATORS = {
+    "HEMATOLOGY": ("BIOCHEMISTRY", "SEROLOGY", "CLINICAL PATHOLOGY"),
+    "BIOCHEMISTRY": ("SEROLOGY", "HEMATOLOGY", "CLINICAL PATHOLOGY"),
+    "SEROLOGY": ("BIOCHEMISTRY", "HEMATOLOGY", "CLINICAL PATHOLOGY"),
+    "CLINICAL PATHOLOGY": ("BIOCHEMISTRY", "HEMATOLOGY", "SEROLOGY"),
+}
+
+_SECTION_MARKER_RE = re.compile(
+    r'(?i:(?P<hematology>HEMATOLOGY)|(?P<biochemistry>BIOCHEMISTRY)'
+    r'|(?P<serology>SEROLOGY)(?P<immunology>/IMMUNOLOGY)?|(?P<clinical>CLINICAL PATHOLOGY))'
+    # Zero-width so a blood group line can never hide a header that follows it
+    r'|(?=(?P<abo>ABO\s+"(?P<blood_group>[A-Z]+)"\s+Rh Type\s+(?P<rh_type>Positive|Negative)))'
+)
+_MARKER_SECTIONS = {
+    "hematology": "HEMATOLOGY",
+    "biochemistry": "BIOCHEMISTRY",
+    "serology": "SEROLOGY",
+    "immunology": "SEROLOGY",
+    "clinical": "CLINICAL PATHOLOGY",
+}
+# Footer closing each report block; the last section of a report has no later header
+_END_OF_REPORT_RE = re.compile(r'-\s*End Of Report\s*-', re.IGNORECASE)
+_LEADING_WHITESPACE_RE = re.compile(r'\s*')
+_ABO_RE = re.compile(r'ABO\s+"([A-Z]+)"\s+Rh Type\s+(Positive|Negative)')
+_HBSAG_RE = re.compile(r'HbsAg\s+(Negative|Positive)')
+_HIV_RE = re.compile(r'HIV (I|II)\s+(Non Reactive|Reactive)')
+
+class SectionIndex:
+    """
+    Offsets of every report section, plus the first ABO/Rh result, found in one pass.
+    A section runs from its first header to the next header of a different section.
+    """
+    def __init__(self, text: str):
+        self.text = text
+        self.blood_group = None
+        self.rh_type = None
+        self._header_ends = {}
+        self._ends = {}
+
+        for marker in _SECTION_MARKER_RE.finditer(text):
+            if marker.group("abo"):
+                if self.blood_group is None:
+                    self.blood_group = marker.group("blood_group")
+                    self.rh_type = marker.group("rh_type")
+                continue
+
+            name = _MARKER_SECTIONS[marker.lastgroup]
+            for section in self._header_ends:
+                if section not in self._ends and name in SECTION_TERMINATORS[section]:
+                    self._ends[section] = marker.start()
+
+            # Serology is only opened by the full SEROLOGY/IMMUNOLOGY header
+            is_header = name != "SEROLOGY" or marker.group("immunology")
+            if is_header and name not in self._header_ends:
+                self._header_ends[name] = marker.end()
+
+    def span(self, section: str) -> Optional[Tuple[int, int]]:
+        """(start, end) offsets of a section's body in the text, or None if it is absent"""
+        header_end = self._header_ends.get(section)
+        if header_end is None:
+            return None
+        start = _LEADING_WHITESPACE_RE.match(self.text, header_end).end()
+        return start, self._ends.get(section, len(self.text))
+
+    def section_text(self, section: str) -> str:
+        span = self.span(section)
+        return self.text[span[0]:span[1]] if span else ""
+
+class SectionTracker:
+    """Follows section headers page by page to tell when the expected sections are complete"""
+    def __init__(self, expected_sections: Iterable[str]):
+        self.expected = set(expected_sections)
+        self.opened = set()
+        self.closed = set()
+
+    def feed(self, page_text: str) -> bool:
+        # An End Of Report footer closes every section opened before it
+        report_end = max((m.start() for m in _END_OF_REPORT_RE.finditer(page_text)), default=-1)
+        if report_end >= 0:
+            self.closed |= self.opened
+        # Headers sit on a single line, so a page never splits one
+        for marker in _SECTION_MARKER_RE.finditer(page_text):
+            if marker.group("abo"):
+                continue
+            name = _MARKER_SECTIONS[marker.lastgroup]
+            for section in self.opened - self.closed:
+                if name in SECTION_TERMINATORS[section]:
+                    self.closed.add(section)
+            if name != "SEROLOGY" or marker.group("immunology"):
+                self.opened.add(name)
+                if marker.start() < report_end:
+                    self.closed.add(name)
+        return self.complete
+
+    @property
+    def complete(self) -> bool:
+        return self.expected <= self.closed
+
+# ------------------ Patient Boundaries ------------------
+_REG_NO_RE = re.compile(r'Reg\.\s*No\.\s*:\s*(\d+\s*\([^)]+\))', re.IGNORECASE)
+_PATIENT_NAME_RE = re.compile(r'Name\s*:\s*([A-Z\s]+?)(?=\s+Reporting Date)', re.IGNORECASE)
+
+def _patient_ids(page_text: str) -> Tuple[Optional[str], Optional[str]]:
+    """(registration number, name) of the patient header on a page, each None when it is missing"""
+    ids = []
+    for pattern in (_REG_NO_RE, _PATIENT_NAME_RE):
+        match = pattern.search(page_text)
+        ids.append(" ".join(match.group(1).split()).upper() if match else None)
+    return ids[0], ids[1]
+
+# ------------------ Page Streaming ------------------
+def _release_page(page):
+    # Drop the parsed objects/layout pdfplumber caches on each page
+    if hasattr(page, "close"):
+        page.close()
+    else:
+        page.flush_cache()
+
+def iter_pdf_pages(pdf_path: str) -> Iterator[str]:
+    """Yield the text of each non-empty page in order, falling back to PyPDF2 where pdfplumber fails"""
+    # Imported on first use: plain CLI runs and cache hits never need a PDF parser.
+    # Kept outside the fallbacks below so a missing dependency fails loudly.
+    import pdfplumber
+
+    pages_read = 0
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                page_text = page.extract_text()
+                _release_page(page)
+                pages_read += 1
+                if page_text:
+                    yield page_text
+        return
+    except Exception as e:
+        print(f"pdfplumber failed, trying PyPDF2: {e}", file=sys.stderr)
+
+    import PyPDF2
+    try:
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            # Resume after the pages pdfplumber already produced
+            for index in range(pages_read, len(pdf_reader.pages)):
+                page_text = pdf_reader.pages[index].extract_text()
+                if page_text:
+                    yield page_text
+    except Exception as e2:
+        print(f"PyPDF2 also failed: {e2}", file=sys.stderr)
+
+# ------------------ Extraction Cache ------------------
+# Bump when extraction logic changes in a way the pattern tables do not capture
+EXTRACTOR_VERSION = "1"
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+def report_to_dict(report: PatientReport) -> Dict:
+    data = {key: value for key, value in report.__dict__.items() if key not in TEST_SECTIONS}
+    for section in TEST_SECTIONS:
+        data[section] = [asdict(test) for test in getattr(report, section)]
+    return data
+
+def report_from_dict(data: Dict) -> PatientReport:
+    report = PatientReport(**data)
+    for section in TEST_SECTIONS:
+        setattr(report, section, [TestResult(**test) for test in data.get(section, [])])
+    return report
+
+class ExtractionCache:
+    """
+    Content-addressed on-disk cache of extraction results, keyed by the PDF bytes and
+    extractor version. Entries are JSON files evicted least-recently-used past max_bytes.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        return [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def key_for_file(pdf_path: str, version: str) -> str:
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(version.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        # Touch the entry so eviction sees it as recently used; another worker may have just evicted it
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        # Write to a temp file and rename so concurrent workers never read a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        path = self._path(key)
+        try:
+            # Overwriting a key replaces its old entry rather than adding to it
+            self._size -= os.stat(path).st_size
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+        self._size += len(data)
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        self._size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                self._size -= size
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes": self._size,
+        }
+
+# ------------------ Reference Data ------------------
+REFERENCE_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_reference_data.json")
+_NAME_NOISE_RE = re.compile(r'[\W_]+')
+
+def normalize_test_name(name: str) -> str:
+    """Lookup key ignoring case, spacing and punctuation: 'M.C.H.', 'mch' and 'M C H' all give 'mch'"""
+    return _NAME_NOISE_RE.sub('', name.casefold())
+
+class ReferenceIndex:
+    """
+    Reference ranges, meanings and tips keyed by canonical test name, with an alias index so
+    lab-specific spellings ('Hemoglobin', 'Hb', 'M.C.V' vs 'MCV') resolve in one dict lookup.
+    """
+    def __init__(self, tests: Dict[str, Dict]):
+        self.data = {name: {key: value for key, value in entry.items() if key != "aliases"}
+                     for name, entry in tests.items()}
+        self.fingerprint = hashlib.sha256(json.dumps(tests, sort_keys=True).encode("utf-8")).hexdigest()
+        self._aliases = {}
+        for name, entry in tests.items():
+            for alias in [name] + entry.get("aliases", []):
+                owner = self._aliases.setdefault(normalize_test_name(alias), name)
+                if owner != name:
+                    raise ValueError(f"Reference alias '{alias}' is claimed by both '{owner}' and '{name}'")
+
+    def resolve(self, test_name: str) -> Optional[str]:
+        """Canonical name for a test name or any of its aliases"""
+        if test_name in self.data:
+            return test_name
+        return self._aliases.get(normalize_test_name(test_name))
+
+    def get(self, test_name: str, default=None) -> Optional[Dict]:
+        canonical = self.resolve(test_name)
+        return self.data[canonical] if canonical else default
+
+    def __contains__(self, test_name: str) -> bool:
+        return self.resolve(test_name) is not None
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+@functools.lru_cache(maxsize=None)
+def load_reference_index(path: str = REFERENCE_DATA_PATH) -> ReferenceIndex:
+    """Parse the reference data file once per process; every extractor shares the result"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return ReferenceIndex(json.load(f)["tests"])
+
+# ------------------ Batch Status Classification ------------------
+_NON_NUMERIC_RE = re.compile(r'[^\d\.]')
+_REFERENCE_RANGE_RE = re.compile(r'(\d+\.?\d*)\s*[-–]\s*(\d+\.?\d*)')
+
+def _parse_result_value(value: str) -> float:
+    # Plain numbers like '13.5' need no cleanup
+    if value.replace(".", "", 1).isdecimal():
+        return float(value)
+    clean_value = _NON_NUMERIC_RE.sub('', value)
+    try:
+        return float(clean_value) if clean_value else float("nan")
+    except ValueError:
+        return float("nan")
+
+def _parse_reference_range(reference_range: str) -> Tuple[float, float]:
+    range_match = _REFERENCE_RANGE_RE.search(reference_range) if reference_range else None
+    if not range_match:
+        return float("nan"), float("nan")
+    return float(range_match.group(1)), float(range_match.group(2))
+
+def _factorize(items, np) -> Tuple[List, "numpy.ndarray"]:
+    """Distinct items in first-seen order plus each item's code, without sorting strings"""
+    items = items if isinstance(items, list) else list(items)
+    uniques = list(dict.fromkeys(items))
+    codes = {item: code for code, item in enumerate(uniques)}
+    return uniques, np.fromiter(map(codes.__getitem__, items), dtype=np.intp, count=len(items))
+
+def classify_test_statuses(test_names, values, reference_ranges, reference_data) -> List[str]:
+    """
+    Vectorized determine_test_status for many results at once, returning identical statuses.
+    Names, values and ranges are parsed once per distinct string; the comparisons run in NumPy.
+    """
+    import numpy as np
+
+    names, name_index = _factorize(test_names, np)
+    raw_values, value_index = _factorize(values, np)
+    ranges, range_index = _factorize(reference_ranges, np)
+
+    numeric = np.array([_parse_result_value(value) for value in raw_values], dtype=float)[value_index]
+
+    # Reference table bounds take precedence over the printed range
+    name_bounds = np.array([
+        (ref["ranges"].get("normal_min", ref["ranges"].get("low", 0)), ref["ranges"].get("normal_max", 999999))
+        if ref else (np.nan, np.nan)
+        for ref in (reference_data.get(name) for name in names)
+    ], dtype=float).reshape(-1, 2)
+    known = np.array([name in reference_data for name in names], dtype=bool)
+    range_bounds = np.array([_parse_reference_range(r) for r in ranges], dtype=float).reshape(-1, 2)
+
+    use_name = known[name_index]
+    low = np.where(use_name, name_bounds[name_index, 0], range_bounds[range_index, 0])
+    high = np.where(use_name, name_bounds[name_index, 1], range_bounds[range_index, 1])
+
+    # NaN bounds compare False, so results without any range fall through to NORMAL
+    status_codes = np.select([np.isnan(numeric), numeric < low, numeric > high], [0, 1, 2], default=3)
+    labels = ("UNKNOWN", "LOW", "HIGH", "NORMAL")
+    return [labels[code] for code in status_codes.tolist()]
+
+class PathologyReportExtractor:
+    # Test pattern tables: (regex, reported test name), compiled once per class below
+    HEMATOLOGY_PATTERNS = [
+        (r'HEMOGLOBIN\s+([\d\.]+)\s+([a-zA-Z%]+)\s+([\d\s\-\.]+)', "HEMOGLOBIN"),
+        (r'Total RBC Count\s+([\d\.]+)\s+([a-zA-Z/]+)\s+([\d\s\-\.]+)', "Total RBC Count"),
+        (r'H\.CT\s+([\d\.]+)\s+([%]+)\s+([\d\s\-]+)', "H.CT"),
+        (r'M\.C\.V\s+([\d\.]+)\s+([\d\s\-]+)', "M.C.V"),
+        (r'M\.C\.H\.\s+([\d\.]+)\s+([a-zA-Z]+)\s+([\d\s\-]+)', "M.C.H."),
+        (r'M\.C\.H\.C\.\s+([\d\.]+)\s+([%]+)\s+([\d\s\-]+)', "M.C.H.C."),
+        (r'R\.D\.W\s+([\d\.]+)\s+([%]+)\s+([\d\s\-\.]+)', "R.D.W"),
+        (r'Total WBC Count \(TLC\)\s+([\d]+)\s+([/a-zA-Z]+)\s+([\d\s\-]+)', "Total WBC Count (TLC)"),
+        (r'Platelet Count\s+([\d]+)\s+([/a-zA-Z]+)\s+([\d\s\-]+)', "Platelet Count"),
+        (r'1 Hour ESR\s+([\d]+)\s+(mm)\s+([\d\s\-]+)', "1 Hour ESR"),
+        (r'Polymorphs\s+([\d]+)\s+([%]+)\s+([\d\s\-]+)', "Polymorphs"),
+        (r'lymphocytes\s+([\d]+)\s+([a-zA-Z]+)\s+([\d\s\-]+)', "Lymphocytes"),
+        (r'Eosinophils\s+([\d]+)\s+([%]+)\s+([\d\s\-]+)', "Eosinophils"),
+        (r'Monocytes\s+([\d]+)\s+([%]+)\s+([\d\s\-]+)', "Monocytes"),
+        (r'Basophils\s+([\d]+)\s+([%]+)\s+([\d\s\-]+)', "Basophils"),
+        (r'PT\s+([\d\.]+)\s+(second)\s+([\d\s\-]+)', "PT (Prothrombin Time)"),
+        (r'INR\s+([\d\.]+)', "INR"),
+        (r'APTT\s+([\d\.]+)\s+(second)\s+([\d\s\-]+)', "APTT (Activated Partial Thrombin Time)")
+    ]
+
+    BIOCHEMISTRY_PATTERNS = [
+        (r'HBA1c \(GLYCOSYLATED\s+HEMOGLOBIN\)\s+([\d\.]+)\s+([%]+)', "HbA1c (Glycosylated Hemoglobin)"),
+        (r'Mean Blood Glucose\s+([\d\.]+)\s+(mg/dL)', "Mean Blood Glucose"),
+        (r'Glucose, Fasting, Plasma\s+([\d\.]+)\s+(mg/dL)\s+([\d\s\-]+)', "Glucose, Fasting, Plasma"),
+        (r'POST PRANDIAL GLUCOSE \( PPBS \)\s+([\d\.]+)\s+(mg/dL)\s+([\d\s\-]+)', "Post Prandial Glucose (PPBS)"),
+        (r'SGPT\s+([\d\.]+)\s+(IU/L)\s+([\d\s\-]+)', "SGPT"),
+        (r'CREATININE\s+([\d\.]+)\s+(mg/dL)\s+([\d\s\-\.]+)', "Creatinine")
+    ]
+
+    URINE_PATTERNS = [
+        (r'Volume\s+([\d]+)\s+(ML)', "Urine Volume"),
+        (r'Colour\s+(Pale Yellow|Yellow|Clear|[A-Za-z\s]+)', "Urine Colour"),
+        (r'Appearance\s+(Clear|Turbid|[A-Za-z\s]+)', "Urine Appearance"),
+        (r'Reaction\s+(Acidic|Alkaline|Neutral)', "Urine Reaction"),
+        (r'Sp\. Gravity\s+([\d\.]+)', "Specific Gravity"),
+        (r'Protein\s+(Nil|Present|Absent|\+*)', "Urine Protein"),
+        (r'Glucose\s+(Present \(\+\+\)|Nil|Absent|Present|\+*)', "Urine Glucose"),
+        (r'Bile Salts\s+(Absent|Present)', "Bile Salts"),
+        (r'Bile Pigments\s+(Absent|Present)', "Bile Pigments"),
+        (r'Pus Cells\s+([\d\-]+)', "Pus Cells"),
+        (r'Red Cells\s+(NIL|\d+)', "Red Cells"),
+        (r'Epithelial Cells\s+(OCCASIONAL|\d+)', "Epithelial Cells"),
+        (r'Casts\s+(Absent|Present)', "Casts"),
+        (r'Fungus\s+(Absent|Present)', "Fungus"),
+        (r'Crystals\s+(Absent|Present)', "Crystals"),
+        (r'Bacteria\s+(Absent|Present)', "Bacteria")
+    ]
+
+    _hematology_scanner = TestPatternScanner(HEMATOLOGY_PATTERNS)
+    _biochemistry_scanner = TestPatternScanner(BIOCHEMISTRY_PATTERNS)
+    _urine_scanner = TestPatternScanner(URINE_PATTERNS)
+
+    def __init__(self, cache: Optional[ExtractionCache] = None, compact_results: bool = False):
+        self.cache = cache
+        self.compact_results = compact_results
         self.current_patient = None
         self.all_patients = []
         
-        self.test_reference_data = {
-            "HEMOGLOBIN": {
-                "ranges": {"normal_min": 12.0, "normal_max": 16.0, "low": 12.0},
-                "meaning": "Hemoglobin carries oxygen in your blood. Low levels can cause fatigue and anemia.",
-                "tips": "Eat iron-rich foods like spinach, beetroot, and jaggery. Combine with Vitamin C foods like citrus fruits."
-            },
-            "Total RBC Count": {
-                "ranges": {"normal_min": 4.5, "normal_max": 5.5, "low": 4.5},
-                "meaning": "Red blood cells carry oxygen throughout your body.",
-                "tips": "Maintain adequate iron, B12, and folate intake through green vegetables and lean meats."
-            },
-            "H.CT": {
-                "ranges": {"normal_min": 36.0, "normal_max": 46.0, "low": 36.0},
-                "meaning": "Hematocrit shows the percentage of blood made up of red blood cells.",
-                "tips": "Stay hydrated and maintain a balanced diet rich in iron."
-            },
-            "M.C.V": {
-                "ranges": {"normal_min": 80.0, "normal_max": 100.0, "low": 80.0},
-                "meaning": "MCV indicates the average size of your red blood cells.",
-                "tips": "Ensure adequate B12 and folate intake through fortified cereals and leafy greens."
-            },
-            "Total WBC Count (TLC)": {
-                "ranges": {"normal_min": 4000, "normal_max": 11000, "low": 4000},
-                "meaning": "White blood cells help fight infections and diseases.",
-                "tips": "Maintain good hygiene, eat immune-boosting foods, and get adequate rest."
-            },
-            "Platelet Count": {
-                "ranges": {"normal_min": 150000, "normal_max": 450000, "low": 150000},
-                "meaning": "Platelets help your blood clot and prevent bleeding.",
-                "tips": "Eat foods rich in folate and B12. Avoid excessive alcohol consumption."
-            },
-            "1 Hour ESR": {
-                "ranges": {"normal_min": 0, "normal_max": 20, "low": 0},
-                "meaning": "ESR indicates inflammation in your body. Higher values may suggest infection or inflammation.",
-                "tips": "If elevated, follow up with your doctor. Maintain anti-inflammatory diet with turmeric and omega-3."
-            },
-            "HbA1c (Glycosylated Hemoglobin)": {
-                "ranges": {"normal_min": 4.0, "normal_max": 6.0, "low": 4.0},
-                "meaning": "HbA1c shows average blood sugar over 2-3 months. Higher values indicate diabetes risk.",
-                "tips": "Control carb intake, exercise regularly, and monitor blood sugar. Consult doctor if elevated."
-            },
-            "Glucose, Fasting, Plasma": {
-                "ranges": {"normal_min": 70, "normal_max": 100, "low": 70},
-                "meaning": "Fasting glucose shows blood sugar after overnight fasting. High levels indicate diabetes.",
-                "tips": "Limit sugary foods, exercise regularly, and maintain healthy weight."
-            },
-            "Post Prandial Glucose (PPBS)": {
-                "ranges": {"normal_min": 70, "normal_max": 140, "low": 70},
-                "meaning": "Post-meal glucose shows how well your body processes sugar after eating.",
-                "tips": "Eat balanced meals, avoid refined sugars, and take short walks after meals."
-            },
-            "SGPT": {
-                "ranges": {"normal_min": 10, "normal_max": 40, "low": 10},
-                "meaning": "SGPT indicates liver function. Elevated levels may suggest liver damage.",
-                "tips": "Limit alcohol, maintain healthy weight, and eat liver-friendly foods like garlic and green tea."
-            },
-            "Creatinine": {
-                "ranges": {"normal_min": 0.6, "normal_max": 1.4, "low": 0.6},
-                "meaning": "Creatinine indicates kidney function. High levels may suggest kidney problems.",
-                "tips": "Stay well hydrated, limit protein supplements, and maintain healthy blood pressure."
-            }
-        }
+        # Shared, process-wide reference table (see load_reference_index)
+        self.reference_index = load_reference_index()
+        self.test_reference_data = self.reference_index.data
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        text = ""
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-        except Exception as e:
-            print(f"pdfplumber failed, trying PyPDF2: {e}")
-            try:
-                with open(pdf_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-            except Exception as e2:
-                print(f"PyPDF2 also failed: {e2}")
+    def extract_text_from_pdf(self, pdf_path: str, expected_sections: Optional[Iterable[str]] = None) -> str:
+        """
+        Join the streamed page text. With expected_sections, stop reading pages once each of
+        those sections has been closed by a later header or an End Of Report footer; their
+        contents are then final.
+        """
+        tracker = SectionTracker(expected_sections) if expected_sections else None
+        pages = []
+        for page_text in iter_pdf_pages(pdf_path):
+            pages.append(page_text + "\n")
+            if tracker and tracker.feed(page_text):
+                break
+        return "".join(pages)
+    
+    def _require_text(self, pdf_path: str, expected_sections: Optional[Iterable[str]] = None) -> str:
+        """extract_text_from_pdf, raising ValueError when no page yielded any text (unreadable or corrupt PDF)"""
+        text = self.extract_text_from_pdf(pdf_path, expected_sections)
+        if not text.strip():
+            raise ValueError(f"no text could be extracted from {pdf_path}")
         return text
     
     def determine_test_status(self, test_name: str, value: str, unit: str, reference_range: str) -> str:
         """Determine if test result is HIGH, LOW, or NORMAL"""
         try:
-            clean_value = re.sub(r'[^\d\.]', '', value)
+            clean_value = _NON_NUMERIC_RE.sub('', value)
             if not clean_value:
                 return "UNKNOWN"
             
             numeric_value = float(clean_value)
             
-            if test_name in self.test_reference_data:
-                ranges = self.test_reference_data[test_name]["ranges"]
+            ref_data = self.reference_index.get(test_name)
+            if ref_data:
+                ranges = ref_data["ranges"]
                 if numeric_value < ranges.get("normal_min", ranges.get("low", 0)):
                     return "LOW"
                 elif numeric_value > ranges.get("normal_max", 999999):
@@ -145,7 +723,7 @@ class PathologyReportExtractor:
                     return "NORMAL"
             
             if reference_range:
-                range_match = re.search(r'(\d+\.?\d*)\s*[-–]\s*(\d+\.?\d*)', reference_range)
+                range_match = _REFERENCE_RANGE_RE.search(reference_range)
                 if range_match:
                     min_val = float(range_match.group(1))
                     max_val = float(range_match.group(2))
@@ -167,6 +745,10 @@ class PathologyReportExtractor:
         except (ValueError, AttributeError):
             return "UNKNOWN"
     
+    def determine_test_statuses(self, test_names, values, reference_ranges) -> List[str]:
+        """Batch form of determine_test_status for re-scoring many stored results"""
+        return classify_test_statuses(test_names, values, reference_ranges, self.reference_index)
+    
     def extract_basic_info(self, text: str) -> Dict[str, str]:
         info = {}
         
@@ -191,53 +773,30 @@ class PathologyReportExtractor:
         
         return info
     
-    def extract_hematology_tests(self, text: str) -> List[TestResult]:
-        hematology_match = re.search(r'HEMATOLOGY\s*(.*?)(?=BIOCHEMISTRY|SEROLOGY|CLINICAL PATHOLOGY|\Z)', text, re.DOTALL | re.IGNORECASE)
-        if not hematology_match:
+    def extract_hematology_tests(self, text: str, sections: Optional[SectionIndex] = None) -> List[TestResult]:
+        span = (sections or SectionIndex(text)).span("HEMATOLOGY")
+        if not span:
             return []
             
-        section_text = hematology_match.group(1)
+        start, end = span
         tests = []
         
-        test_patterns = [
-            (r'HEMOGLOBIN\s+([\d\.]+)\s+([a-zA-Z%]+)\s+([\d\s\-\.]+)', "HEMOGLOBIN"),
-            (r'Total RBC Count\s+([\d\.]+)\s+([a-zA-Z/]+)\s+([\d\s\-\.]+)', "Total RBC Count"),
-            (r'H\.CT\s+([\d\.]+)\s+([%]+)\s+([\d\s\-]+)', "H.CT"),
-            (r'M\.C\.V\s+([\d\.]+)\s+([\d\s\-]+)', "M.C.V"),
-            (r'M\.C\.H\.\s+([\d\.]+)\s+([a-zA-Z]+)\s+([\d\s\-]+)', "M.C.H."),
-            (r'M\.C\.H\.C\.\s+([\d\.]+)\s+([%]+)\s+([\d\s\-]+)', "M.C.H.C."),
-            (r'R\.D\.W\s+([\d\.]+)\s+([%]+)\s+([\d\s\-\.]+)', "R.D.W"),
-            (r'Total WBC Count \(TLC\)\s+([\d]+)\s+([/a-zA-Z]+)\s+([\d\s\-]+)', "Total WBC Count (TLC)"),
-            (r'Platelet Count\s+([\d]+)\s+([/a-zA-Z]+)\s+([\d\s\-]+)', "Platelet Count"),
-            (r'1 Hour ESR\s+([\d]+)\s+(mm)\s+([\d\s\-]+)', "1 Hour ESR"),
-            (r'Polymorphs\s+([\d]+)\s+([%]+)\s+([\d\s\-]+)', "Polymorphs"),
-            (r'lymphocytes\s+([\d]+)\s+([a-zA-Z]+)\s+([\d\s\-]+)', "Lymphocytes"),
-            (r'Eosinophils\s+([\d]+)\s+([%]+)\s+([\d\s\-]+)', "Eosinophils"),
-            (r'Monocytes\s+([\d]+)\s+([%]+)\s+([\d\s\-]+)', "Monocytes"),
-            (r'Basophils\s+([\d]+)\s+([%]+)\s+([\d\s\-]+)', "Basophils"),
-            (r'PT\s+([\d\.]+)\s+(second)\s+([\d\s\-]+)', "PT (Prothrombin Time)"),
-            (r'INR\s+([\d\.]+)', "INR"),
-            (r'APTT\s+([\d\.]+)\s+(second)\s+([\d\s\-]+)', "APTT (Activated Partial Thrombin Time)")
-        ]
-        
-        for pattern, test_name in test_patterns:
-            match = re.search(pattern, section_text)
-            if match:
-                value = match.group(1)
-                unit = match.group(2) if len(match.groups()) >= 2 else ""
-                reference = match.group(3) if len(match.groups()) >= 3 else ""
-                
-                status = self.determine_test_status(test_name, value, unit, reference)
-                
-                tests.append(TestResult(
-                    name=test_name,
-                    value=value,
-                    unit=unit,
-                    reference_range=reference,
-                    status=status
-                ))
+        for test_name, match in self._hematology_scanner.scan(text, start, end):
+            value = match.group(1)
+            unit = match.group(2) if len(match.groups()) >= 2 else ""
+            reference = match.group(3) if len(match.groups()) >= 3 else ""
+            
+            status = self.determine_test_status(test_name, value, unit, reference)
+            
+            tests.append(TestResult(
+                name=test_name,
+                value=value,
+                unit=unit,
+                reference_range=reference,
+                status=status
+            ))
         
-        abo_match = re.search(r'ABO\s+"([A-Z]+)"\s+Rh Type\s+(Positive|Negative)', section_text)
+        abo_match = _ABO_RE.search(text, start, end)
         if abo_match:
             tests.append(TestResult(
                 name="ABO Blood Group",
@@ -252,51 +811,40 @@ class PathologyReportExtractor:
         
         return tests
     
-    def extract_biochemistry_tests(self, text: str) -> List[TestResult]:
-        biochemistry_match = re.search(r'BIOCHEMISTRY\s*(.*?)(?=SEROLOGY|HEMATOLOGY|CLINICAL PATHOLOGY|\Z)', text, re.DOTALL | re.IGNORECASE)
-        if not biochemistry_match:
+    def extract_biochemistry_tests(self, text: str, sections: Optional[SectionIndex] = None) -> List[TestResult]:
+        span = (sections or SectionIndex(text)).span("BIOCHEMISTRY")
+        if not span:
             return []
             
-        section_text = biochemistry_match.group(1)
+        start, end = span
         tests = []
         
-        test_patterns = [
-            (r'HBA1c \(GLYCOSYLATED\s+HEMOGLOBIN\)\s+([\d\.]+)\s+([%]+)', "HbA1c (Glycosylated Hemoglobin)"),
-            (r'Mean Blood Glucose\s+([\d\.]+)\s+(mg/dL)', "Mean Blood Glucose"),
-            (r'Glucose, Fasting, Plasma\s+([\d\.]+)\s+(mg/dL)\s+([\d\s\-]+)', "Glucose, Fasting, Plasma"),
-            (r'POST PRANDIAL GLUCOSE \( PPBS \)\s+([\d\.]+)\s+(mg/dL)\s+([\d\s\-]+)', "Post Prandial Glucose (PPBS)"),
-            (r'SGPT\s+([\d\.]+)\s+(IU/L)\s+([\d\s\-]+)', "SGPT"),
-            (r'CREATININE\s+([\d\.]+)\s+(mg/dL)\s+([\d\s\-\.]+)', "Creatinine")
-        ]
-        
-        for pattern, test_name in test_patterns:
-            match = re.search(pattern, section_text)
-            if match:
-                value = match.group(1)
-                unit = match.group(2) if len(match.groups()) >= 2 else ""
-                reference = match.group(3) if len(match.groups()) >= 3 else ""
-                
-                status = self.determine_test_status(test_name, value, unit, reference)
-                
-                tests.append(TestResult(
-                    name=test_name,
-                    value=value,
-                    unit=unit,
-                    reference_range=reference,
-                    status=status
-                ))
+        for test_name, match in self._biochemistry_scanner.scan(text, start, end):
+            value = match.group(1)
+            unit = match.group(2) if len(match.groups()) >= 2 else ""
+            reference = match.group(3) if len(match.groups()) >= 3 else ""
+            
+            status = self.determine_test_status(test_name, value, unit, reference)
+            
+            tests.append(TestResult(
+                name=test_name,
+                value=value,
+                unit=unit,
+                reference_range=reference,
+                status=status
+            ))
         
         return tests
     
-    def extract_serology_tests(self, text: str) -> List[TestResult]:
-        serology_match = re.search(r'SEROLOGY/IMMUNOLOGY\s*(.*?)(?=BIOCHEMISTRY|HEMATOLOGY|CLINICAL PATHOLOGY|\Z)', text, re.DOTALL | re.IGNORECASE)
-        if not serology_match:
+    def extract_serology_tests(self, text: str, sections: Optional[SectionIndex] = None) -> List[TestResult]:
+        span = (sections or SectionIndex(text)).span("SEROLOGY")
+        if not span:
             return []
             
-        section_text = serology_match.group(1)
+        start, end = span
         tests = []
         
-        hbsag_match = re.search(r'HbsAg\s+(Negative|Positive)', section_text)
+        hbsag_match = _HBSAG_RE.search(text, start, end)
         if hbsag_match:
             status = "NORMAL" if hbsag_match.group(1) == "Negative" else "ABNORMAL"
             tests.append(TestResult(
@@ -305,7 +853,7 @@ class PathologyReportExtractor:
                 status=status
             ))
         
-        hiv_matches = re.findall(r'HIV (I|II)\s+(Non Reactive|Reactive)', section_text)
+        hiv_matches = _HIV_RE.findall(text, start, end)
         for match in hiv_matches:
             status = "NORMAL" if match[1] == "Non Reactive" else "ABNORMAL"
             tests.append(TestResult(
@@ -316,51 +864,30 @@ class PathologyReportExtractor:
         
         return tests
     
-    def extract_clinical_pathology_tests(self, text: str) -> List[TestResult]:
-        clinical_match = re.search(r'CLINICAL PATHOLOGY\s*(.*?)(?=BIOCHEMISTRY|HEMATOLOGY|SEROLOGY|\Z)', text, re.DOTALL | re.IGNORECASE)
-        if not clinical_match:
+    def extract_clinical_pathology_tests(self, text: str, sections: Optional[SectionIndex] = None) -> List[TestResult]:
+        span = (sections or SectionIndex(text)).span("CLINICAL PATHOLOGY")
+        if not span:
             return []
             
-        section_text = clinical_match.group(1)
+        start, end = span
         tests = []
         
-        urine_patterns = [
-            (r'Volume\s+([\d]+)\s+(ML)', "Urine Volume"),
-            (r'Colour\s+(Pale Yellow|Yellow|Clear|[A-Za-z\s]+)', "Urine Colour"),
-            (r'Appearance\s+(Clear|Turbid|[A-Za-z\s]+)', "Urine Appearance"),
-            (r'Reaction\s+(Acidic|Alkaline|Neutral)', "Urine Reaction"),
-            (r'Sp\. Gravity\s+([\d\.]+)', "Specific Gravity"),
-            (r'Protein\s+(Nil|Present|Absent|\+*)', "Urine Protein"),
-            (r'Glucose\s+(Present \(\+\+\)|Nil|Absent|Present|\+*)', "Urine Glucose"),
-            (r'Bile Salts\s+(Absent|Present)', "Bile Salts"),
-            (r'Bile Pigments\s+(Absent|Present)', "Bile Pigments"),
-            (r'Pus Cells\s+([\d\-]+)', "Pus Cells"),
-            (r'Red Cells\s+(NIL|\d+)', "Red Cells"),
-            (r'Epithelial Cells\s+(OCCASIONAL|\d+)', "Epithelial Cells"),
-            (r'Casts\s+(Absent|Present)', "Casts"),
-            (r'Fungus\s+(Absent|Present)', "Fungus"),
-            (r'Crystals\s+(Absent|Present)', "Crystals"),
-            (r'Bacteria\s+(Absent|Present)', "Bacteria")
-        ]
-        
-        for pattern, test_name in urine_patterns:
-            match = re.search(pattern, section_text)
-            if match:
-                value = match.group(1)
-                unit = match.group(2) if len(match.groups()) >= 2 else ""
-                
-                status = "NORMAL"
-                if test_name in ["Urine Protein", "Urine Glucose"] and value not in ["Nil", "Absent"]:
-                    status = "ABNORMAL"
-                elif test_name in ["Bile Salts", "Bile Pigments", "Casts", "Fungus", "Crystals", "Bacteria"] and value == "Present":
-                    status = "ABNORMAL"
-                
-                tests.append(TestResult(
-                    name=test_name,
-                    value=value,
-                    unit=unit,
-                    status=status
-                ))
+        for test_name, match in self._urine_scanner.scan(text, start, end):
+            value = match.group(1)
+            unit = match.group(2) if len(match.groups()) >= 2 else ""
+            
+            status = "NORMAL"
+            if test_name in ["Urine Protein", "Urine Glucose"] and value not in ["Nil", "Absent"]:
+                status = "ABNORMAL"
+            elif test_name in ["Bile Salts", "Bile Pigments", "Casts", "Fungus", "Crystals", "Bacteria"] and value == "Present":
+                status = "ABNORMAL"
+            
+            tests.append(TestResult(
+                name=test_name,
+                value=value,
+                unit=unit,
+                status=status
+            ))
         
         return tests
     
@@ -372,30 +899,134 @@ class PathologyReportExtractor:
             if hasattr(report, key):
                 setattr(report, key, value)
         
-        report.hematology_tests = self.extract_hematology_tests(patient_text)
-        report.biochemistry_tests = self.extract_biochemistry_tests(patient_text)
-        report.serology_tests = self.extract_serology_tests(patient_text)
-        report.clinical_pathology_tests = self.extract_clinical_pathology_tests(patient_text)
+        sections = SectionIndex(patient_text)
+        report.hematology_tests = self.extract_hematology_tests(patient_text, sections)
+        report.biochemistry_tests = self.extract_biochemistry_tests(patient_text, sections)
+        report.serology_tests = self.extract_serology_tests(patient_text, sections)
+        report.clinical_pathology_tests = self.extract_clinical_pathology_tests(patient_text, sections)
         
-        abo_match = re.search(r'ABO\s+"([A-Z]+)"\s+Rh Type\s+(Positive|Negative)', patient_text)
-        if abo_match:
-            report.blood_group = abo_match.group(1)
-            report.rh_type = abo_match.group(2)
+        report.blood_group = sections.blood_group
+        report.rh_type = sections.rh_type
         
-        return report
+        return report.compact() if self.compact_results else report
     
-    def analyze_pathology_report(self, pdf_path: str) -> PatientReport:
-        full_text = self.extract_text_from_pdf(pdf_path)
+    def analyze_pathology_report(self, pdf_path: str, expected_sections: Optional[Iterable[str]] = None) -> PatientReport:
+        if self.cache is not None:
+            return self._extract_cached(pdf_path, expected_sections)[0]
+        full_text = self.extract_text_from_pdf(pdf_path, expected_sections)
         return self.create_patient_report(full_text)
     
+    def iter_patient_reports(self, pdf_path: str, expected_sections: Optional[Iterable[str]] = None) -> Iterator[PatientReport]:
+        """
+        Yield one PatientReport per patient of a multi-patient PDF as soon as their pages are read.
+        Patients are keyed on the Reg. No. of their page headers, or on the Name when the first
+        header has no Reg. No.; a page starts a new patient when its key differs from the current
+        one, and pages without that key belong to the current patient. Headerless pages before the
+        first identified patient (e.g. a cover page whose header text does not parse) belong to
+        that patient. With expected_sections, a patient's remaining pages are skipped once those
+        sections are complete, as in extract_text_from_pdf.
+        """
+        pages = []
+        key_field = None
+        tracker = SectionTracker(expected_sections) if expected_sections else None
+        complete = False
+        self.current_patient = None
+        for page_text in iter_pdf_pages(pdf_path):
+            ids = _patient_ids(page_text)
+            if key_field is None and any(ids):
+                key_field = 0 if ids[0] else 1
+            patient_key = ids[key_field] if key_field is not None else None
+            if patient_key and patient_key != self.current_patient:
+                # Only flush pages that belong to an identified patient
+                if pages and self.current_patient is not None:
+                    yield self.create_patient_report("".join(pages))
+                    pages = []
+                    tracker = SectionTracker(expected_sections) if expected_sections else None
+                    complete = False
+                self.current_patient = patient_key
+            if complete:
+                continue
+            pages.append(page_text + "\n")
+            if tracker:
+                complete = tracker.feed(page_text)
+
+        if pages:
+            yield self.create_patient_report("".join(pages))
+        self.current_patient = None
+    
+    def iter_patient_records(self, pdf_path: str, expected_sections: Optional[Iterable[str]] = None) -> Iterator[Dict]:
+        """
+        create_json_for_generator for each patient of iter_patient_reports, as they are read.
+        With a cache, each patient is stored as its own entry next to a count entry for the PDF,
+        so a hit is also streamed one patient at a time.
+        """
+        if self.cache is None:
+            for report in self.iter_patient_reports(pdf_path, expected_sections):
+                yield self.create_json_for_generator(report)
+            return
+
+        version = self.cache_version + "|split|" + ",".join(sorted(expected_sections or ()))
+        key = self.cache.key_for_file(pdf_path, version)
+        served = 0
+        entry = self.cache.get(key)
+        if entry is not None:
+            for index in range(entry["patients"]):
+                patient_entry = self.cache.get(f"{key}-{index}")
+                if patient_entry is None:
+                    # Evicted since the count was written: extract again from this patient on
+                    break
+                yield patient_entry["json"]
+                served += 1
+            else:
+                return
+
+        patients = 0
+        for index, report in enumerate(self.iter_patient_reports(pdf_path, expected_sections)):
+            json_data = self.create_json_for_generator(report)
+            self.cache.put(f"{key}-{index}", {"json": json_data})
+            patients += 1
+            if index >= served:
+                yield json_data
+        # A PDF with no readable patient is never cached
+        if patients:
+            self.cache.put(key, {"patients": patients})
+    
+    def extract_json_for_generator(self, pdf_path: str, expected_sections: Optional[Iterable[str]] = None) -> Dict:
+        """
+        analyze_pathology_report + create_json_for_generator, served from the cache when possible.
+        Raises ValueError when no text could be extracted from the PDF.
+        """
+        if self.cache is not None:
+            return self._extract_cached(pdf_path, expected_sections)[1]
+        report = self.create_patient_report(self._require_text(pdf_path, expected_sections))
+        return self.create_json_for_generator(report)
+    
+    @property
+    def cache_version(self) -> str:
+        """Changes whenever the patterns or reference data that shape the output change"""
+        tables = (self.HEMATOLOGY_PATTERNS, self.BIOCHEMISTRY_PATTERNS, self.URINE_PATTERNS)
+        payload = json.dumps([EXTRACTOR_VERSION, tables, self.reference_index.fingerprint], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def _extract_cached(self, pdf_path: str, expected_sections: Optional[Iterable[str]]) -> Tuple[PatientReport, Dict]:
+        version = self.cache_version + "|" + ",".join(sorted(expected_sections or ()))
+        key = self.cache.key_for_file(pdf_path, version)
+        entry = self.cache.get(key)
+        if entry is not None:
+            report = report_from_dict(entry["report"])
+            return (report.compact() if self.compact_results else report), entry["json"]
+
+        # Raises for unreadable PDFs so a failed extraction is never cached
+        report = self.create_patient_report(self._require_text(pdf_path, expected_sections))
+        json_data = self.create_json_for_generator(report)
+        self.cache.put(key, {"report": report_to_dict(report), "json": json_data})
+        return report, json_data
+    
     def create_json_for_generator(self, report: PatientReport) -> Dict:
         """Create JSON format expected by the PDF generator"""
         tests = []
         
-        all_tests = (report.hematology_tests + report.biochemistry_tests + 
-                    report.serology_tests + report.clinical_pathology_tests)
-        
-        for test in all_tests:
+        for test in report.all_tests():
             test_data = {
                 "name": test.name,
                 "value": test.value,
@@ -403,8 +1034,8 @@ class PathologyReportExtractor:
                 "status": test.status
             }
             
-            if test.name in self.test_reference_data:
-                ref_data = self.test_reference_data[test.name]
+            ref_data = self.reference_index.get(test.name)
+            if ref_data:
                 test_data["ranges"] = ref_data["ranges"]
                 test_data["meaning"] = ref_data["meaning"]
                 test_data["tips"] = ref_data["tips"]
@@ -443,7 +1074,288 @@ class PathologyReportExtractor:
         print(f"Total tests exported: {len(json_data['tests'])}")
         return filename
 
-def main():
+# ------------------ NDJSON Output ------------------
+class NDJSONWriter:
+    """
+    Streams generator JSON records as compact NDJSON, one patient per line, to a file
+    (appended) or stdout ('-'). Output is flushed every flush_every records and on close.
+    """
+    def __init__(self, target: str = "-", flush_every: int = 100):
+        self.target = target
+        self.flush_every = flush_every
+        self.records_written = 0
+        self._file = sys.stdout if target == "-" else open(target, 'a', encoding='utf-8')
+
+    def write(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.records_written += 1
+        if self.records_written % self.flush_every == 0:
+            self._file.flush()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        if self._file is not sys.stdout:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# ------------------ Batch Ingest ------------------
+MANIFEST_EXTENSIONS = (".txt", ".lst", ".manifest")
+
+@dataclass
+class BatchSummary:
+    output_dir: str
+    processed: List[Dict] = field(default_factory=list)
+    failures: List[Dict] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return len(self.processed) + len(self.failures)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(1 for item in self.processed if item.get("cached"))
+
+def collect_pdf_paths(sources: List[str]) -> List[str]:
+    """Expand directories, glob patterns and manifest files into a de-duplicated list of PDF paths"""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, files in os.walk(source):
+                paths.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith(".pdf"))
+        elif any(ch in source for ch in "*?["):
+            paths.extend(sorted(glob.glob(source, recursive=True)))
+        elif source.lower().endswith(MANIFEST_EXTENSIONS):
+            base_dir = os.path.dirname(os.path.abspath(source))
+            with open(source, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        paths.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+        else:
+            paths.append(source)
+
+    seen = set()
+    unique = []
+    for path in paths:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+def _output_names(pdf_paths: List[str]) -> List[str]:
+    """One JSON name per input, disambiguating inputs that share a file stem (a.json, a_2.json, ...)"""
+    taken = set()
+    names = []
+    for path in pdf_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name = f"{stem}.json"
+        suffix = 1
+        # An input may itself be called a_2.pdf, so check every candidate against the names already used
+        while name in taken:
+            suffix += 1
+            name = f"{stem}_{suffix}.json"
+        taken.add(name)
+        names.append(name)
+    return names
+
+# One extractor per worker process, created by the pool initializer
+_worker_extractor = None
+
+def _init_batch_worker(cache_dir: Optional[str] = None, cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+    global _worker_extractor
+    cache = ExtractionCache(cache_dir, cache_max_bytes) if cache_dir else None
+    _worker_extractor = PathologyReportExtractor(cache=cache)
+
+# Without a json_path, workers hand their records back for the parent's NDJSON writer
+def _process_pdf(pdf_path: str, json_path: Optional[str], expected_sections: Optional[Tuple[str, ...]] = None) -> Dict:
+    extractor = _worker_extractor or PathologyReportExtractor()
+    hits_before = extractor.cache.hits if extractor.cache else 0
+    json_data = extractor.extract_json_for_generator(pdf_path, expected_sections)
+    result = {"input": pdf_path, "output": json_path, "tests": len(json_data["tests"])}
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(json_data, f, indent=2, ensure_ascii=False)
+    else:
+        result["records"] = [json_data]
+    result["cached"] = bool(extractor.cache and extractor.cache.hits > hits_before)
+    return result
+
+def _process_multi_patient_pdf(pdf_path: str, json_path: Optional[str],
+                               expected_sections: Optional[Tuple[str, ...]] = None,
+                               spool_path: Optional[str] = None, emit=None) -> Dict:
+    """
+    Extract each patient of a multi-patient PDF and hand over its record as soon as the patient's
+    pages end: to emit, as a line of the spool_path NDJSON file, or as <json stem>_<n>.json.
+    """
+    extractor = _worker_extractor or PathologyReportExtractor()
+    hits_before = extractor.cache.hits if extractor.cache else 0
+    stem = os.path.splitext(json_path)[0] if json_path else None
+    result = {"input": pdf_path, "outputs": [], "patients": 0, "tests": 0}
+    spool = open(spool_path, 'w', encoding='utf-8') if spool_path else None
+    try:
+        for index, json_data in enumerate(extractor.iter_patient_records(pdf_path, expected_sections), start=1):
+            result["patients"] += 1
+            result["tests"] += len(json_data["tests"])
+            if emit:
+                emit(json_data)
+            elif spool:
+                spool.write(json.dumps(json_data, ensure_ascii=False, separators=(",", ":")) + "\n")
+            else:
+                patient_path = f"{stem}_{index}.json"
+                with open(patient_path, 'w', encoding='utf-8') as f:
+                    json.dump(json_data, f, indent=2, ensure_ascii=False)
+                result["outputs"].append(patient_path)
+    finally:
+        if spool:
+            spool.close()
+    if not result["patients"]:
+        raise ValueError(f"no text could be extracted from {pdf_path}")
+    result["cached"] = bool(extractor.cache and extractor.cache.hits > hits_before)
+    return result
+
+def process_batch(pdf_paths: List[str], output_dir: str, workers: Optional[int] = None,
+                  expected_sections: Optional[Tuple[str, ...]] = None, cache_dir: Optional[str] = None,
+                  cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, split_patients: bool = False,
+                  ndjson_writer: Optional[NDJSONWriter] = None) -> BatchSummary:
+    """
+    Extract every PDF across a process pool, writing one JSON per input plus batch_summary.json.
+    With split_patients, each input is treated as a multi-patient PDF and gets one JSON per patient.
+    With an ndjson_writer, records are streamed to it as inputs (or, when splitting, patients) finish
+    instead of written as files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = [(path, None if ndjson_writer else os.path.join(output_dir, name), name)
+            for path, name in zip(pdf_paths, _output_names(pdf_paths))]
+    summary = BatchSummary(output_dir=output_dir)
+    workers = workers or os.cpu_count() or 1
+    pooled = workers > 1 and len(jobs) > 1
+    spool_paths = {}
+
+    def write_record(pdf_path, json_data):
+        ndjson_writer.write(dict(json_data, source=pdf_path))
+
+    def job_args(pdf_path, json_path, name):
+        if not split_patients:
+            return _process_pdf, (pdf_path, json_path, expected_sections)
+        if ndjson_writer and pooled:
+            # Pool workers cannot reach the writer: each spools its patients to a file streamed from here
+            spool_path = spool_paths[name] = os.path.join(output_dir, f".{name}.ndjson.part")
+            return _process_multi_patient_pdf, (pdf_path, json_path, expected_sections, spool_path)
+        if ndjson_writer:
+            return _process_multi_patient_pdf, (pdf_path, json_path, expected_sections, None,
+                                                functools.partial(write_record, pdf_path))
+        return _process_multi_patient_pdf, (pdf_path, json_path, expected_sections)
+
+    def drain_spool(pdf_path, name):
+        # Patients finished before a failure are kept, as they are when emitted in-process
+        spool_path = spool_paths.pop(name, None)
+        if spool_path and os.path.exists(spool_path):
+            with open(spool_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    write_record(pdf_path, json.loads(line))
+            os.remove(spool_path)
+
+    def record(pdf_path, name, run):
+        try:
+            result = run()
+        except Exception as e:
+            summary.failures.append({"input": pdf_path, "error": f"{type(e).__name__}: {e}"})
+            return
+        finally:
+            drain_spool(pdf_path, name)
+        for json_data in result.pop("records", ()):
+            write_record(pdf_path, json_data)
+        summary.processed.append(result)
+
+    if not pooled:
+        _init_batch_worker(cache_dir, cache_max_bytes)
+        for pdf_path, json_path, name in jobs:
+            func, func_args = job_args(pdf_path, json_path, name)
+            record(pdf_path, name, lambda: func(*func_args))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                 initargs=(cache_dir, cache_max_bytes)) as executor:
+            futures = {}
+            for pdf_path, json_path, name in jobs:
+                func, func_args = job_args(pdf_path, json_path, name)
+                futures[executor.submit(func, *func_args)] = (pdf_path, name)
+            for future in as_completed(futures):
+                record(*futures[future], future.result)
+
+    with open(os.path.join(output_dir, "batch_summary.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            "total": summary.total,
+            "succeeded": len(summary.processed),
+            "failed": len(summary.failures),
+            "cache_hits": summary.cache_hits,
+            "failures": summary.failures
+        }, f, indent=2, ensure_ascii=False)
+
+    return summary
+
+def run_batch(sources: List[str], output_dir: str, workers: Optional[int] = None,
+              expected_sections: Optional[Tuple[str, ...]] = None, cache_dir: Optional[str] = None,
+              cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, split_patients: bool = False,
+              ndjson_path: Optional[str] = None) -> BatchSummary:
+    # Keep stdout clean for the records when streaming NDJSON there
+    log = sys.stderr if ndjson_path == "-" else sys.stdout
+    pdf_paths = collect_pdf_paths(sources)
+    print(f"Processing {len(pdf_paths)} PDF(s) with {workers or os.cpu_count() or 1} worker(s)...", file=log)
+
+    ndjson_writer = NDJSONWriter(ndjson_path) if ndjson_path else None
+    try:
+        summary = process_batch(pdf_paths, output_dir, workers, expected_sections, cache_dir, cache_max_bytes,
+                                split_patients, ndjson_writer)
+    finally:
+        if ndjson_writer:
+            ndjson_writer.close()
+
+    print(f"✅ {len(summary.processed)} succeeded, ❌ {len(summary.failures)} failed", file=log)
+    if split_patients:
+        print(f"Patients extracted: {sum(item['patients'] for item in summary.processed)}", file=log)
+    if cache_dir:
+        print(f"Cache hits: {summary.cache_hits}/{summary.total}", file=log)
+    if ndjson_writer:
+        print(f"NDJSON records written: {ndjson_writer.records_written} to {ndjson_path}", file=log)
+    for failure in summary.failures:
+        print(f"  {failure['input']}: {failure['error']}", file=log)
+    print(f"Summary written to {os.path.join(output_dir, 'batch_summary.json')}", file=log)
+    return summary
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Extract pathology report PDFs into PDF generator JSON.")
+    parser.add_argument("inputs", nargs="*", help="PDF files, directories, glob patterns or manifest files (one path per line)")
+    parser.add_argument("-o", "--output-dir", default="batch_output", help="Directory for per-input JSON files in batch mode")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--early-stop", action="store_true",
+                        help="Stop reading pages once every known section has been closed by a later header")
+    parser.add_argument("--cache-dir", default=None, help="Directory for the content-addressed extraction cache")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="Extraction cache size limit in MB before least-recently-used entries are evicted")
+    parser.add_argument("--split-patients", action="store_true",
+                        help="Treat inputs as multi-patient PDFs and write one JSON per patient as it is parsed")
+    parser.add_argument("--ndjson", default=None, metavar="PATH",
+                        help="Append one compact JSON record per patient to PATH ('-' for stdout) instead of per-input files")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.inputs:
+        expected_sections = tuple(SECTION_TERMINATORS) if args.early_stop else None
+        summary = run_batch(args.inputs, args.output_dir, args.workers, expected_sections,
+                            args.cache_dir, args.cache_max_mb * 1024 * 1024, args.split_patients, args.ndjson)
+        return 1 if summary.failures else 0
+
     pdf_path = "AHM-209989_result_wlpd.pdf"
     
     try:
@@ -477,4 +1389,4 @@ def main():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pdf_generator as gen
+from fonts import report_missing_fonts
+
+# ------------------ Render Service ------------------
+# A resident process that keeps WeasyPrint, the fonts, the parsed stylesheets and the
+# translation memory warm, so each request only pays for translation misses and layout.
+#
+#   GET  /health             -> service status as JSON
+#   POST /render             -> {"report": {...}, "lang": "hi"[, "output_path": "p/hi.pdf"]}
+#                               PDF bytes, or JSON with the written path when output_path is given
+#   POST /render/multilang   -> {"report": {...}, "output_folder": "p"[, "languages": ["hi", "ta"]]}
+#                               JSON with one result per language
+# Output paths are resolved under the service's --output-dir and may not escape it.
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+LANGUAGE_NAMES = dict(gen.MULTILANG_LANGUAGES, en="English")
+
+class RenderService:
+    def __init__(self, output_dir, workers=None, letterhead_path="logo_img.png"):
+        self.output_dir = os.path.abspath(output_dir)
+        self.letterhead_path = letterhead_path
+        self.workers = workers or min(len(LANGUAGE_NAMES), os.cpu_count() or 1)
+        self.started = time.time()
+        self.requests = 0
+        self.failures = 0
+        self.pool_restarts = 0
+        self.pool_broken = False
+        self._lock = threading.Lock()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self.missing_fonts = [entry.lang_code for entry in report_missing_fonts(gen.FONT_REGISTRY)]
+        self.pool = self._start_pool()
+
+    def _start_pool(self):
+        pool = gen.create_render_pool(self.workers, LANGUAGE_NAMES)
+        # Start every worker now so the first request does not pay for the warm-up. Every render goes
+        # through the pool, so the parent builds no render contexts of its own.
+        list(pool.map(time.sleep, [0.05] * self.workers))
+        return pool
+
+    def _replace_pool(self, broken_pool):
+        """Swap a pool whose worker died for a fresh one; /health reports degraded until it is warm"""
+        self.pool_broken = True
+        with self._lock:
+            # Concurrent requests on the same broken pool replace it only once
+            if self.pool is broken_pool:
+                # Keep the broken pool until the new one is up, so a failed start is retried next request
+                self.pool = self._start_pool()
+                broken_pool.shutdown(wait=False)
+                self.pool_restarts += 1
+            self.pool_broken = False
+
+    def close(self):
+        self.pool.shutdown()
+
+    def _count(self, success):
+        with self._lock:
+            self.requests += 1
+            if not success:
+                self.failures += 1
+
+    def resolve_output(self, path):
+        resolved = os.path.abspath(os.path.join(self.output_dir, path))
+        if os.path.commonpath([resolved, self.output_dir]) != self.output_dir:
+            raise ValueError(f"output path escapes the service output directory: {path}")
+        return resolved
+
+    def _job(self, report_data, lang_code, output_pdf):
+        if lang_code not in LANGUAGE_NAMES:
+            raise ValueError(f"unsupported language: {lang_code}")
+        font_family = gen.register_font_for_lang(lang_code)
+        if lang_code == "en":
+            labels, translated_data = gen.get_translated_labels("en"), report_data
+        else:
+            labels, translated_data = gen.translate_report_data(report_data, lang_code)
+        html_content = gen.generate_report_html(translated_data, lang_code, LANGUAGE_NAMES[lang_code], labels,
+                                                font_family, self.letterhead_path)
+        return (None, output_pdf, lang_code, LANGUAGE_NAMES[lang_code], labels, font_family, self.letterhead_path,
+                html_content)
+
+    def render(self, report_data, lang_code, output_path=None):
+        """Render one language. Returns (result, pdf_bytes); pdf_bytes is None when written to output_path."""
+        output_pdf = None
+        if output_path:
+            output_pdf = self.resolve_output(output_path)
+            os.makedirs(os.path.dirname(output_pdf), exist_ok=True)
+        # Without an output path the worker hands the PDF bytes straight back; nothing touches the disk
+        job = self._job(report_data, lang_code, output_pdf)
+        pool = self.pool
+        try:
+            result = gen.render_languages([job], pool)[lang_code]
+        except BrokenProcessPool:
+            self._count(False)
+            self._replace_pool(pool)
+            raise
+        pdf_bytes = result.pop("data", None)
+        self._count(result["success"])
+        return result, pdf_bytes
+
+    def render_multilang(self, report_data, output_folder, languages=None):
+        unsupported = [code for code in (languages or ()) if code not in LANGUAGE_NAMES]
+        if unsupported:
+            raise ValueError(f"unsupported language(s): {', '.join(unsupported)}")
+        folder = self.resolve_output(output_folder)
+        os.makedirs(folder, exist_ok=True)
+        selected = {code: LANGUAGE_NAMES[code] for code in (languages or gen.MULTILANG_LANGUAGES)}
+        pool = self.pool
+        try:
+            results = gen.generate_multilang_reports_from_data(report_data, folder, self.letterhead_path, selected,
+                                                               render_pool=pool)
+        except BrokenProcessPool:
+            self._count(False)
+            self._replace_pool(pool)
+            raise
+        self._count(all(result["success"] for result in results.values()))
+        return results
+
+    def health(self):
+        return {
+            "status": "degraded" if self.pool_broken else "ok",
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "workers": self.workers,
+            "pool_restarts": self.pool_restarts,
+            "requests": self.requests,
+            "failures": self.failures,
+            "missing_fonts": self.missing_fonts,
+            "translation": gen.get_default_translator().stats(),
+        }
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def _send(self, status, body, content_type="application/json"):
+        if content_type == "application/json":
+            body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._send(200, self.service.health())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        route = urlparse(self.path).path
+        if route not in ("/render", "/render/multilang"):
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            report_data = payload["report"]
+        except (ValueError, KeyError) as e:
+            self._send(400, {"error": f"invalid request body: {e}"})
+            return
+
+        try:
+            if route == "/render":
+                result, pdf_bytes = self.service.render(report_data, payload.get("lang", "en"), payload.get("output_path"))
+                if not result["success"]:
+                    self._send(500, result)
+                elif pdf_bytes is not None:
+                    self._send(200, pdf_bytes, "application/pdf")
+                else:
+                    self._send(200, result)
+            else:
+                results = self.service.render_multilang(report_data, payload.get("output_folder", "."),
+                                                        payload.get("languages"))
+                for result in results.values():
+                    result.pop("data", None)
+                failed = any(not result["success"] for result in results.values())
+                self._send(500 if failed else 200, {"results": results})
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+        except BrokenProcessPool as e:
+            # The pool has been replaced by now, so the client can simply retry
+            self._send(503, {"error": f"render worker died: {e}"})
+        except Exception as e:
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}", file=sys.stderr)
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    handler = type("BoundRenderRequestHandler", (RenderRequestHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident PDF render service keeping WeasyPrint and caches warm.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Render worker processes")
+    parser.add_argument("-o", "--output-dir", default="reports_service", help="Root for output paths in requests")
+    parser.add_argument("--letterhead", default="logo_img.png")
+    args = parser.parse_args(argv)
+
+    service = RenderService(args.output_dir, args.workers, args.letterhead)
+    server = create_server(service, args.host, args.port)
+    print(f"✅ Render service listening on http://{args.host}:{server.server_address[1]} with {service.workers} worker(s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
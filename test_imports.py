@@ -0,0 +1,9 @@
+import pytest
+
+from benchmarks import IMPORT_BUDGETS_MS, LAZY_DEPENDENCIES, measure_import
+
+# Timing budgets are machine-dependent; they are checked by `python benchmarks.py --import-budget`
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_MS))
+def test_import_skips_lazy_dependencies(module):
+    _, imported = measure_import(module, runs=1)
+    assert not [dep for dep in LAZY_DEPENDENCIES if dep in imported]
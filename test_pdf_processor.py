@@ -0,0 +1,130 @@
+import json
+import os
+import re
+
+import pytest
+
+import pdf_processor
+from pdf_processor import PathologyReportExtractor
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AHM-209989_result_wlpd.pdf")
+
+def test_sample_pdf_is_one_patient():
+    extractor = PathologyReportExtractor()
+    reports = list(extractor.iter_patient_reports(SAMPLE_PDF))
+    assert len(reports) == 1
+    assert extractor.create_json_for_generator(reports[0]) == extractor.extract_json_for_generator(SAMPLE_PDF)
+
+def test_early_stop_reads_fewer_pages(monkeypatch):
+    pages_read = []
+    iter_pages = pdf_processor.iter_pdf_pages
+
+    def counting_iter(pdf_path):
+        for page_text in iter_pages(pdf_path):
+            pages_read.append(page_text)
+            yield page_text
+
+    monkeypatch.setattr(pdf_processor, "iter_pdf_pages", counting_iter)
+    extractor = PathologyReportExtractor()
+    full = extractor.analyze_pathology_report(SAMPLE_PDF)
+    total_pages = len(pages_read)
+    del pages_read[:]
+
+    early = extractor.analyze_pathology_report(SAMPLE_PDF, expected_sections=("HEMATOLOGY", "BIOCHEMISTRY"))
+    assert len(pages_read) < total_pages
+    assert early.hematology_tests == full.hematology_tests
+    assert early.biochemistry_tests == full.biochemistry_tests
+
+def test_scanner_matches_per_pattern_search():
+    # Labels that hide inside others: M.C.H. in M.C.H.C., PT in APTT
+    text = ("APTT 31.1 second 27 - 35\nM.C.H.C. 36.7 % 32 - 36\nM.C.H. 30.3 pg 27 - 32\n"
+            "PT 12.6 second 11 - 13\nINR 0.91\n")
+    patterns = PathologyReportExtractor.HEMATOLOGY_PATTERNS
+    expected = [(name, m.span()) for pattern, name in patterns for m in [re.search(pattern, text)] if m]
+    found = [(name, m.span()) for name, m in pdf_processor.TestPatternScanner(patterns).scan(text)]
+    assert found == expected
+    assert [name for name, _ in found] == ["M.C.H.", "M.C.H.C.", "PT (Prothrombin Time)", "INR",
+                                          "APTT (Activated Partial Thrombin Time)"]
+
+def test_pages_without_reg_no_stay_with_their_patient(monkeypatch):
+    pages = [
+        "Reg. No. : 1001 (OPD)\nName : JOHN DOE Reporting Date : 01/01/2024\nHEMATOLOGY",
+        "Name : JOHN DOE Reporting Date : 01/01/2024\nBIOCHEMISTRY",
+        "Reg. No. : 1002 (OPD)\nName : JANE ROE Reporting Date : 01/01/2024\nHEMATOLOGY",
+    ]
+    monkeypatch.setattr(pdf_processor, "iter_pdf_pages", lambda pdf_path: iter(pages))
+    reports = list(PathologyReportExtractor().iter_patient_reports("batch.pdf"))
+    assert len(reports) == 2
+
+def test_split_batch_streams_patients_to_ndjson(tmp_path):
+    ndjson_path = str(tmp_path / "records.ndjson")
+    for workers in (1, 2):
+        with pdf_processor.NDJSONWriter(ndjson_path) as writer:
+            summary = pdf_processor.process_batch([SAMPLE_PDF, SAMPLE_PDF], str(tmp_path / "out"), workers,
+                                                  split_patients=True, ndjson_writer=writer)
+        assert not summary.failures
+        assert not [name for name in os.listdir(tmp_path / "out") if name.endswith(".part")]
+    with open(ndjson_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 4
+    assert {record["source"] for record in records} == {SAMPLE_PDF}
+
+def test_extraction_cache_hit_and_miss(tmp_path):
+    extractor = PathologyReportExtractor(cache=pdf_processor.ExtractionCache(str(tmp_path)))
+    first = extractor.extract_json_for_generator(SAMPLE_PDF)
+    assert (extractor.cache.hits, extractor.cache.misses) == (0, 1)
+    assert extractor.extract_json_for_generator(SAMPLE_PDF) == first
+    assert (extractor.cache.hits, extractor.cache.misses) == (1, 1)
+
+def test_extraction_cache_overwrite_keeps_size(tmp_path):
+    cache = pdf_processor.ExtractionCache(str(tmp_path))
+    cache.put("key", {"json": {"tests": []}})
+    size = cache.stats()["bytes"]
+    cache.put("key", {"json": {"tests": []}})
+    assert cache.stats()["bytes"] == size == os.path.getsize(tmp_path / "key.json")
+
+def test_result_table_round_trips_results():
+    results = [
+        pdf_processor.TestResult("HEMOGLOBIN", "16.20", "gm%", "13 - 17", "NORMAL"),
+        pdf_processor.TestResult("Platelet Count", "250000", "/cumm", "150000 - 410000", "NORMAL"),
+        pdf_processor.TestResult("HbsAg", "Negative"),
+        pdf_processor.TestResult("INR", "0.91", status="NORMAL"),
+    ]
+    table = pdf_processor.TestResultTable.from_results(results)
+    assert len(table) == len(results)
+    assert table.to_list() == results
+    assert table[-1] == results[-1]
+
+def test_compacted_report_matches_list_report():
+    report = PathologyReportExtractor().analyze_pathology_report(SAMPLE_PDF)
+    compacted = PathologyReportExtractor(compact_results=True).analyze_pathology_report(SAMPLE_PDF)
+    assert isinstance(compacted.hematology_tests, pdf_processor.TestResultTable)
+    assert list(compacted.all_tests()) == list(report.all_tests())
+
+def test_ndjson_records_read_back(tmp_path):
+    from pdf_generator import iter_report_records
+
+    json_data = PathologyReportExtractor().extract_json_for_generator(SAMPLE_PDF)
+    ndjson_path = str(tmp_path / "reports.ndjson")
+    with pdf_processor.NDJSONWriter(ndjson_path, flush_every=1) as writer:
+        writer.write(json_data)
+        writer.write(dict(json_data, source="second.pdf"))
+    with open(ndjson_path, "a", encoding="utf-8") as f:
+        f.write("\n{not json\n")
+
+    records = iter_report_records(ndjson_path)
+    assert next(records) == json_data
+    assert next(records) == dict(json_data, source="second.pdf")
+    assert list(records) == []
+
+def test_reference_index_resolves_aliases():
+    index = pdf_processor.load_reference_index()
+    assert index.resolve("HEMOGLOBIN") == "HEMOGLOBIN"
+    assert index.resolve("Haemoglobin") == index.resolve("hb") == "HEMOGLOBIN"
+    assert index.resolve("M C V") == index.resolve("mcv") == "M.C.V"
+    assert index.get("Platelets") is index.data["Platelet Count"]
+    assert index.resolve("Not A Test") is None
+
+def test_reference_index_rejects_shared_alias():
+    with pytest.raises(ValueError):
+        pdf_processor.ReferenceIndex({"HEMOGLOBIN": {"aliases": ["Hb"]}, "HbA1c": {"aliases": ["HB"]}})
@@ -0,0 +1,104 @@
+import re
+import time
+
+import translation
+from translation import (CachedTranslator, FakeLatencyBackend, GoogleBackend, LocalBackend, RequestLimiter,
+                         TokenBucket, TranslationMemory, TranslationPlan, split_numbered_reply)
+
+class ScriptedGoogleBackend(GoogleBackend):
+    """GoogleBackend whose requests fail for every text listed in `failing` instead of reaching the network"""
+    def __init__(self, failing=(), **kwargs):
+        super().__init__(**kwargs)
+        self.failing = set(failing)
+        self.requests = []
+
+    def _request(self, text, target_lang):
+        self.calls += 1
+        self.requests.append(text)
+        if any(bad in text for bad in self.failing):
+            raise ConnectionError("injected")
+        # Keeps the "<index>. " numbering of batched lines, like the real translator
+        return re.sub(r'^(\d+\. )?', lambda m: f"{m.group(1) or ''}[{target_lang}] ", text, flags=re.MULTILINE)
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # Two tokens come from the burst, the other two take 1/20 s each
+    assert time.monotonic() - start >= 0.09
+
+def test_limiter_takes_a_token_per_outgoing_request(monkeypatch):
+    limiter = RequestLimiter(requests_per_second=1000, retries=0)
+    acquired = []
+    monkeypatch.setattr(limiter._bucket, "acquire", lambda tokens=1.0: acquired.append(tokens))
+    backend = ScriptedGoogleBackend(max_chars=30, limiter=limiter)
+    texts = ["Hemoglobin", "Platelet Count", "Glucose", "Creatinine"]
+    backend.translate_batch(texts, "hi")
+    assert len(acquired) == backend.calls == len(backend.requests) > 1
+
+def test_failed_chunk_is_retried_alone():
+    limiter = RequestLimiter(requests_per_second=None, retries=2, backoff=0)
+    # max_chars=50 gives two chunks: [Hemoglobin, Platelet Count] and [Glucose, Creatinine]
+    backend = ScriptedGoogleBackend(failing={"Glucose"}, max_chars=50, limiter=limiter)
+    results = backend.translate_batch(["Hemoglobin", "Platelet Count", "Glucose", "Creatinine"], "hi")
+    assert backend.requests == ["0. Hemoglobin\n1. Platelet Count"] + ["0. Glucose\n1. Creatinine"] * 3
+    assert results == ["[hi] Hemoglobin", "[hi] Platelet Count", None, None]
+
+def test_fake_latency_backend_retries_injected_failures():
+    backend = FakeLatencyBackend(latency=0, failure_rate=0.5, seed=1,
+                                 limiter=RequestLimiter(requests_per_second=None, retries=20, backoff=0))
+    assert backend.translate_batch(["Hemoglobin", "Glucose"], "fr") == ["[fr] Hemoglobin", "[fr] Glucose"]
+    assert backend.limiter.retried == backend.failures > 0
+
+def test_failed_strings_fall_back_to_source_uncached():
+    memory = TranslationMemory(":memory:")
+    backend = ScriptedGoogleBackend(failing={"Glucose"}, limiter=RequestLimiter(requests_per_second=None, retries=0))
+    translator = CachedTranslator(backend, memory)
+    assert translator.translate_many(["Glucose"], "hi") == ["Glucose"]
+    assert memory.get("Glucose", "hi", backend.name) is None
+
+def test_translation_memory_ttl(monkeypatch):
+    memory = TranslationMemory(":memory:", ttl_seconds=60)
+    memory.put("Hemoglobin", "hi", "local", "हीमोग्लोबिन")
+    assert memory.get("Hemoglobin", "hi", "local") == "हीमोग्लोबिन"
+    now = time.time()
+    monkeypatch.setattr(translation.time, "time", lambda: now + 61)
+    assert memory.get("Hemoglobin", "hi", "local") is None
+
+def test_translation_memory_evicts_least_recently_used():
+    memory = TranslationMemory(":memory:", max_entries=100)
+    memory.put_many(((f"old {index}", f"ancien {index}") for index in range(200)), "fr", "local")
+    # Crossing 256 puts trims the table back to the 100 most recently used rows
+    memory.put_many(((f"new {index}", f"nouveau {index}") for index in range(100)), "fr", "local")
+    assert memory.stats()["entries"] == 100
+    memory._lru.clear()
+    assert memory.get("old 0", "fr", "local") is None
+    assert memory.get("new 99", "fr", "local") == "nouveau 99"
+
+def test_translation_plan_sends_each_string_once():
+    backend = LocalBackend()
+    translator = CachedTranslator(backend, TranslationMemory(":memory:"))
+    plan = TranslationPlan()
+    slots = [plan.add(text) for text in ("Normal", "High", "Normal", "", "High")]
+    assert len(plan) == 2
+    plan.run(translator, "fr")
+    assert [plan.get(slot) for slot in slots] == ["[fr] Normal", "[fr] High", "[fr] Normal", "", "[fr] High"]
+    assert (backend.calls, backend.strings) == (1, 2)
+
+def test_split_numbered_reply_rejects_misaligned_lines():
+    sources = ["Hemoglobin", "Glucose"]
+    assert split_numbered_reply("0. Hémoglobine\n1. Glucose", sources) == ["Hémoglobine", "Glucose"]
+    assert split_numbered_reply("0. Hémoglobine Glucose", sources) is None
+    assert split_numbered_reply("1. Glucose\n0. Hémoglobine", sources) is None
+    assert split_numbered_reply("0. Hémoglobine\n1. ", sources) is None
+
+def test_misaligned_batch_reply_falls_back_to_single_strings():
+    class MergingBackend(ScriptedGoogleBackend):
+        def _request(self, text, target_lang):
+            # Merges batched lines into one, as the real translator sometimes does
+            return super()._request(text, target_lang).replace("\n", " ")
+
+    backend = MergingBackend()
+    assert backend.translate_batch(["Hemoglobin", "Glucose"], "hi") == ["[hi] Hemoglobin", "[hi] Glucose"]
+    assert backend.requests == ["0. Hemoglobin\n1. Glucose", "Hemoglobin", "Glucose"]
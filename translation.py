@@ -0,0 +1,468 @@
+import os
+import re
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+# ------------------ Translation Memory ------------------
+# Report labels and the meaning/tips boilerplate are identical across patients,
+# so every translation is kept on disk and reused by later runs.
+DEFAULT_TRANSLATION_DB = os.environ.get(
+    "TRANSLATION_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "translation_memory.sqlite3"),
+)
+DEFAULT_TTL_SECONDS = 90 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 200000
+DEFAULT_LRU_SIZE = 4096
+
+class TranslationMemory:
+    """
+    SQLite-backed translation store keyed by (source text, target language, backend),
+    with an in-process LRU in front. Entries older than ttl_seconds are treated as misses;
+    once the table grows past max_entries the least recently used rows are dropped.
+    """
+    def __init__(self, db_path: str = DEFAULT_TRANSLATION_DB, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, lru_size: int = DEFAULT_LRU_SIZE):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._puts_since_evict = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " backend TEXT NOT NULL, target TEXT NOT NULL, source TEXT NOT NULL,"
+            " translated TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (backend, target, source))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key, translated: str, created_at: float):
+        self._lru[key] = (translated, created_at)
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get(self, text: str, target_lang: str, backend: str) -> Optional[str]:
+        key = (backend, target_lang, text)
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+
+            row = self._conn.execute(
+                "SELECT translated, created_at FROM translations WHERE backend = ? AND target = ? AND source = ?",
+                key,
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                self._lru.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE translations SET last_used = ? WHERE backend = ? AND target = ? AND source = ?",
+                (now,) + key,
+            )
+            self._conn.commit()
+            self._remember(key, row[0], row[1])
+            self.disk_hits += 1
+            return row[0]
+
+    def put(self, text: str, target_lang: str, backend: str, translated: str):
+        key = (backend, target_lang, text)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (backend, target, source, translated, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                key + (translated, now, now),
+            )
+            self._conn.commit()
+            self._remember(key, translated, now)
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= 256:
+                self._evict()
+
+    def put_many(self, items: Iterable, target_lang: str, backend: str):
+        """Store (text, translated) pairs in a single transaction"""
+        now = time.time()
+        with self._lock:
+            rows = [(backend, target_lang, text, translated, now, now) for text, translated in items]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (backend, target, source, translated, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            for row in rows:
+                self._remember(row[:3], row[3], now)
+            self._puts_since_evict += len(rows)
+            if self._puts_since_evict >= 256:
+                self._evict()
+
+    def _evict(self):
+        """Drop expired rows and trim the table back to max_entries (caller holds the lock)"""
+        self._puts_since_evict = 0
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM translations WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM translations WHERE rowid IN"
+                " (SELECT rowid FROM translations ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        self._conn.commit()
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        return {
+            "entries": entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ------------------ Backends ------------------
+# A backend has a `name`, translate(text, target_lang) and translate_batch(texts, target_lang);
+# `calls` counts round trips so callers can report how many requests a run needed. Network
+# backends take an optional RequestLimiter that every outgoing request goes through.
+# translate_batch returns None for strings it could not translate.
+BATCH_SEPARATOR = "\n"
+MAX_BATCH_CHARS = 4500
+# Batched lines are numbered "<index>. <text>" so the reply can be checked line by line
+NUMBERED_LINE_OVERHEAD = 8
+_NUMBERED_LINE_RE = re.compile(r'\s*(\d+)\s*[.।۔]\s?(.*)', re.DOTALL)
+
+def chunk_texts(texts: List[str], max_chars: int = MAX_BATCH_CHARS, item_overhead: int = 0) -> List[List[str]]:
+    """Group texts into chunks whose separator-joined length (plus item_overhead per text) stays under max_chars"""
+    chunks, current, size = [], [], 0
+    for text in texts:
+        if current and size + len(BATCH_SEPARATOR) + len(text) + item_overhead > max_chars:
+            chunks.append(current)
+            current, size = [], 0
+        size += len(text) + item_overhead + (len(BATCH_SEPARATOR) if current else 0)
+        current.append(text)
+    if current:
+        chunks.append(current)
+    return chunks
+
+def split_numbered_reply(reply: str, sources: List[str]) -> Optional[List[str]]:
+    """
+    Lines of a numbered batch reply with their numbers stripped, or None unless every line is
+    numbered 0..n-1 in order (native digits are accepted) and no non-empty source came back empty.
+    """
+    lines = [line for line in reply.split(BATCH_SEPARATOR) if line.strip()]
+    if len(lines) != len(sources):
+        return None
+    results = []
+    for index, (line, source) in enumerate(zip(lines, sources)):
+        match = _NUMBERED_LINE_RE.fullmatch(line)
+        if not match or int(match.group(1)) != index:
+            return None
+        text = match.group(2).strip()
+        if source.strip() and not text:
+            return None
+        results.append(text)
+    return results
+
+class GoogleBackend:
+    """
+    deep_translator's GoogleTranslator, one instance reused per target language.
+    Batches are sent as one request per chunk of numbered lines ("0. text", "1. text", ...).
+    If the reply's lines do not carry exactly those numbers in order, or a line came back empty,
+    the translator merged, split or dropped lines and the chunk is retried string by string,
+    so misaligned translations never reach the translation memory. A chunk whose request still
+    fails after the limiter's retries comes back as None without affecting the other chunks.
+    """
+    name = "google"
+
+    def __init__(self, source_lang: str = "en", max_chars: int = MAX_BATCH_CHARS,
+                 limiter: Optional["RequestLimiter"] = None):
+        self.source_lang = source_lang
+        self.max_chars = max_chars
+        self.limiter = limiter
+        self._translators = {}
+        self.calls = 0
+
+    def _translator(self, target_lang: str):
+        translator = self._translators.get(target_lang)
+        if translator is None:
+            from deep_translator import GoogleTranslator
+            translator = self._translators[target_lang] = GoogleTranslator(source=self.source_lang, target=target_lang)
+        return translator
+
+    def _request(self, text: str, target_lang: str) -> str:
+        self.calls += 1
+        return self._translator(target_lang).translate(text)
+
+    def translate(self, text: str, target_lang: str) -> str:
+        if self.limiter:
+            return self.limiter.call(self._request, text, target_lang)
+        return self._request(text, target_lang)
+
+    def _try_translate(self, text: str, target_lang: str) -> Optional[str]:
+        try:
+            return self.translate(text, target_lang)
+        except Exception:
+            return None
+
+    def translate_batch(self, texts: List[str], target_lang: str) -> List[Optional[str]]:
+        joinable = [text for text in texts if BATCH_SEPARATOR not in text]
+        translated = {}
+        for chunk in chunk_texts(joinable, self.max_chars, NUMBERED_LINE_OVERHEAD):
+            if len(chunk) > 1:
+                request = BATCH_SEPARATOR.join(f"{index}. {text}" for index, text in enumerate(chunk))
+                reply = self._try_translate(request, target_lang)
+                if reply is None:
+                    # Out of retries: string-by-string requests would only repeat them during an outage
+                    translated.update(dict.fromkeys(chunk))
+                    continue
+                lines = split_numbered_reply(reply, chunk)
+                if lines is not None:
+                    translated.update(zip(chunk, lines))
+                    continue
+            translated.update((text, self._try_translate(text, target_lang)) for text in chunk)
+        return [translated[text] if text in translated else self._try_translate(text, target_lang) for text in texts]
+
+class LocalBackend:
+    """
+    Offline stand-in backend: looks strings up in an optional {target_lang: {text: translation}}
+    glossary and otherwise tags them with the language code. Used for tests and dry runs.
+    """
+    name = "local"
+
+    def __init__(self, glossary: Optional[Dict[str, Dict[str, str]]] = None):
+        self.glossary = glossary or {}
+        self.calls = 0
+        self.strings = 0
+
+    def _lookup(self, text: str, target_lang: str) -> str:
+        return self.glossary.get(target_lang, {}).get(text, f"[{target_lang}] {text}")
+
+    def translate(self, text: str, target_lang: str) -> str:
+        self.calls += 1
+        self.strings += 1
+        return self._lookup(text, target_lang)
+
+    def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        self.calls += 1
+        self.strings += len(texts)
+        return [self._lookup(text, target_lang) for text in texts]
+
+class FakeLatencyBackend(LocalBackend):
+    """
+    LocalBackend whose every call is one simulated network request: it sleeps `latency` seconds,
+    fails `failure_rate` of the time and goes through the optional RequestLimiter like GoogleBackend.
+    """
+    name = "fake"
+
+    def __init__(self, latency: float = 0.2, failure_rate: float = 0.0, seed: Optional[int] = None,
+                 glossary: Optional[Dict[str, Dict[str, str]]] = None, limiter: Optional["RequestLimiter"] = None):
+        super().__init__(glossary)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.limiter = limiter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.failures = 0
+
+    def _request(self, method, *args):
+        time.sleep(self.latency)
+        with self._lock:
+            if self._random.random() < self.failure_rate:
+                self.failures += 1
+                raise ConnectionError("injected translation failure")
+        return method(*args)
+
+    def _send(self, method, *args):
+        if self.limiter:
+            return self.limiter.call(self._request, method, *args)
+        return self._request(method, *args)
+
+    def translate(self, text: str, target_lang: str) -> str:
+        return self._send(super().translate, text, target_lang)
+
+    def translate_batch(self, texts: List[str], target_lang: str) -> List[str]:
+        return self._send(super().translate_batch, texts, target_lang)
+
+# ------------------ Rate Limiting ------------------
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_SECOND = 5.0
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 0.5
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `capacity`"""
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then take them"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+class RequestLimiter:
+    """
+    Shared by a backend's outgoing requests: at most max_concurrency are in flight, each one is
+    paced by a token bucket, and a failed request is retried on its own with exponential backoff
+    and jitter.
+    """
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 requests_per_second: Optional[float] = DEFAULT_REQUESTS_PER_SECOND, burst: Optional[float] = None,
+                 retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF_SECONDS):
+        self.retries = retries
+        self.backoff = backoff
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.retried = 0
+
+    def call(self, request, *args):
+        """Run request(*args) as one rate-limited request, retrying it until it succeeds or retries run out"""
+        for attempt in range(self.retries + 1):
+            if self._bucket:
+                self._bucket.acquire()
+            try:
+                with self._slots:
+                    return request(*args)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                self.retried += 1
+                time.sleep(self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+class CachedTranslator:
+    """
+    Looks every string up in the translation memory before calling the backend.
+    Failed translations fall back to the source text and are not cached, so they are retried next run.
+    """
+    def __init__(self, backend=None, memory: Optional[TranslationMemory] = None):
+        self.backend = backend or GoogleBackend(limiter=RequestLimiter())
+        self.memory = memory if memory is not None else TranslationMemory()
+
+    def translate(self, text: str, target_lang: str) -> str:
+        if not text:
+            return ""
+        cached = self.memory.get(text, target_lang, self.backend.name)
+        if cached is not None:
+            return cached
+        try:
+            translated = self.backend.translate(text, target_lang)
+        except Exception:
+            return text
+        if not translated:
+            return text
+        self.memory.put(text, target_lang, self.backend.name, translated)
+        return translated
+
+    def translate_many(self, texts: List[str], target_lang: str) -> List[str]:
+        """
+        Translate a list of unique, non-empty strings: cached ones come from memory and the rest go
+        to the backend in one batch. Strings the backend could not translate after its retries (None,
+        or the whole batch raising) fall back to their source text, uncached, rather than being
+        retried one by one.
+        """
+        results = [self.memory.get(text, target_lang, self.backend.name) for text in texts]
+        missing = [text for text, cached in zip(texts, results) if cached is None]
+        if not missing:
+            return results
+
+        try:
+            translated = self.backend.translate_batch(missing, target_lang)
+        except Exception:
+            # Per-string calls would repeat the whole retry/backoff cycle for every string during an outage
+            translated = list(missing)
+        else:
+            fresh = [(text, out) for text, out in zip(missing, translated) if out]
+            self.memory.put_many(fresh, target_lang, self.backend.name)
+
+        lookup = {text: out or text for text, out in zip(missing, translated)}
+        return [cached if cached is not None else lookup[text] for text, cached in zip(texts, results)]
+
+    def stats(self) -> Dict:
+        stats = self.memory.stats()
+        stats["backend"] = self.backend.name
+        stats["backend_calls"] = getattr(self.backend, "calls", None)
+        return stats
+
+class TranslationPlan:
+    """
+    Collects every string a report needs, deduplicated, so one language costs a single batched
+    lookup instead of a round trip per field. add() returns a slot; run() fills the slots.
+    """
+    def __init__(self):
+        self._slots = {}
+        self._texts = []
+        self._results = None
+
+    def add(self, text: str) -> Optional[int]:
+        if not text:
+            return None
+        slot = self._slots.get(text)
+        if slot is None:
+            slot = self._slots[text] = len(self._texts)
+            self._texts.append(text)
+        return slot
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def run(self, translator: "CachedTranslator", target_lang: str) -> "TranslationPlan":
+        self._results = translator.translate_many(self._texts, target_lang) if self._texts else []
+        return self
+
+    def get(self, slot: Optional[int]) -> str:
+        return "" if slot is None else self._results[slot]
+
+_default_translator = None
+
+def get_default_translator() -> CachedTranslator:
+    """Process-wide translator shared by pdf_generator.translate_text"""
+    global _default_translator
+    if _default_translator is None:
+        _default_translator = CachedTranslator()
+    return _default_translator
+
+def set_default_translator(translator: Optional[CachedTranslator]):
+    """Swap the process-wide translator (e.g. a different backend or database); None resets it"""
+    global _default_translator
+    _default_translator = translator